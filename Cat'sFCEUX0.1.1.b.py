@@ -6,7 +6,7 @@
 #  GUI: Native Tkinter | 600x400 Display
 # ══════════════════════════════════════════════════════════════
 
-import struct, time, os, threading, sys, math, random
+import struct, time, os, threading, sys, math, random, array, hashlib
 import tkinter as tk
 from tkinter import filedialog, messagebox, Menu, Frame, Canvas, Label
 
@@ -36,7 +36,10 @@ def god_console(nes):
     print("    Commands: 'exit', 'reset', 'dump', 'state'")
     print("═"*60)
 
+    # A single namespace (module globals plus shortcuts) so exec doesn't
+    # probe two dicts, and each distinct command is only compiled once
     env = {
+        **globals(),
         'nes': nes,
         'cpu': nes.cpu,
         'ppu': nes.ppu,
@@ -44,6 +47,7 @@ def god_console(nes):
         'math': math,
         'sys': sys
     }
+    compiled = {}
 
     while True:
         try:
@@ -65,7 +69,10 @@ def god_console(nes):
                 print(f"Frame: {nes.frame_count} | Cycles: {nes.cpu.total_cycles}")
                 print(f"ROM: {'LOADED' if sys_bus.rom_loaded else 'NONE'}")
             else:
-                exec(cmd, globals(), env)
+                code = compiled.get(cmd)
+                if code is None:
+                    code = compiled[cmd] = compile(cmd, '<god>', 'single')
+                exec(code, env)
 
         except Exception as e:
             print(f"❌ Error: {e}")
@@ -78,8 +85,7 @@ def god_console(nes):
 
 class CPU:
     __slots__ = ('nes', 'a', 'x', 'y', 'sp', 'pc', 'status', 'cycles', 
-                 'extra_cycles', 'total_cycles', 'nmi_pending', 'irq_pending',
-                 'op_table', 'cycles_table')
+                 'total_cycles', 'nmi_pending', 'irq_pending', 'interrupt_pending', 'blocks')
     
     def __init__(self, nes):
         self.nes = nes
@@ -90,13 +96,12 @@ class CPU:
         self.pc = 0
         self.status = 0x24
         self.cycles = 0
-        self.extra_cycles = 0
         self.total_cycles = 0
         self.nmi_pending = False
         self.irq_pending = False
-        self.op_table = [None] * 256
-        self.cycles_table = [0] * 256
-        self.build_instruction_set()
+        # Set alongside nmi_pending/irq_pending so the run loop tests one flag
+        self.interrupt_pending = False
+        self.blocks = {}  # PRG address -> compiled basic block
 
     def reset(self):
         self.a = self.x = self.y = 0
@@ -107,19 +112,6 @@ class CPU:
         self.total_cycles = 0
         print(f"[CPU] RESET | Entry Point: ${self.pc:04X}")
 
-    def get_flag(self, mask):
-        return bool(self.status & mask)
-
-    def set_flag(self, mask, val):
-        if val:
-            self.status |= mask
-        else:
-            self.status &= ~mask
-
-    def set_zn(self, val):
-        self.set_flag(0x02, val == 0)
-        self.set_flag(0x80, val & 0x80)
-
     def push(self, val):
         self.nes.write(0x100 + self.sp, val & 0xFF)
         self.sp = (self.sp - 1) & 0xFF
@@ -140,373 +132,432 @@ class CPU:
     def nmi(self):
         self.push16(self.pc)
         self.push(self.status & ~0x10)
-        self.set_flag(0x04, True)
+        self.status |= 0x04
         self.pc = self.nes.read16(0xFFFA)
         self.cycles = 7
 
     def irq(self):
-        if not self.get_flag(0x04):
+        if not (self.status & 0x04):
             self.push16(self.pc)
             self.push(self.status & ~0x10)
-            self.set_flag(0x04, True)
+            self.status |= 0x04
             self.pc = self.nes.read16(0xFFFE)
             self.cycles = 7
 
-    # Addressing modes
-    def imm(self): return self.pc; self.pc += 1
-    def zpg(self): addr = self.nes.read(self.pc); self.pc += 1; return addr
-    def zpgx(self): return (self.nes.read(self.pc) + self.x) & 0xFF; self.pc += 1
-    def zpgy(self): return (self.nes.read(self.pc) + self.y) & 0xFF; self.pc += 1
-    def abs(self): addr = self.nes.read16(self.pc); self.pc += 2; return addr
-    def absx(self): 
-        addr = self.nes.read16(self.pc); self.pc += 2
-        if (addr & 0xFF00) != ((addr + self.x) & 0xFF00):
-            self.extra_cycles = 1
-        return addr + self.x
-    def absy(self):
-        addr = self.nes.read16(self.pc); self.pc += 2
-        if (addr & 0xFF00) != ((addr + self.y) & 0xFF00):
-            self.extra_cycles = 1
-        return addr + self.y
-    def ind(self):
-        addr = self.nes.read16(self.pc); self.pc += 2
-        if (addr & 0xFF) == 0xFF:
-            return (self.nes.read(addr & 0xFF00) << 8) | self.nes.read(addr)
-        return self.nes.read16(addr)
-    def indx(self):
-        base = self.nes.read(self.pc); self.pc += 1
-        addr = (base + self.x) & 0xFF
-        return self.nes.read(addr) | (self.nes.read((addr + 1) & 0xFF) << 8)
-    def indy(self):
-        base = self.nes.read(self.pc); self.pc += 1
-        addr = self.nes.read(base) | (self.nes.read((base + 1) & 0xFF) << 8)
-        if (addr & 0xFF00) != ((addr + self.y) & 0xFF00):
-            self.extra_cycles = 1
-        return addr + self.y
-
-    # Instruction implementations
-    def ADC(self, addr): 
-        val = self.nes.read(addr)
-        carry = self.get_flag(0x01)
-        res = self.a + val + carry
-        self.set_flag(0x01, res > 0xFF)
-        self.set_flag(0x40, ((self.a ^ val) & 0x80) == 0 and ((self.a ^ res) & 0x80) != 0)
-        self.a = res & 0xFF
-        self.set_zn(self.a)
-    
-    def AND(self, addr): self.a &= self.nes.read(addr); self.set_zn(self.a)
-    def ASL(self, addr): 
-        if addr is None:  # Accumulator
-            self.set_flag(0x01, self.a & 0x80)
-            self.a = (self.a << 1) & 0xFF
-            self.set_zn(self.a)
-        else:
-            val = self.nes.read(addr)
-            self.set_flag(0x01, val & 0x80)
-            val = (val << 1) & 0xFF
-            self.nes.write(addr, val)
-            self.set_zn(val)
-    
-    def BCC(self, addr): 
-        if not self.get_flag(0x01): 
-            self.pc = addr
-            self.cycles += 1
-    def BCS(self, addr): 
-        if self.get_flag(0x01): 
-            self.pc = addr
-            self.cycles += 1
-    def BEQ(self, addr): 
-        if self.get_flag(0x02): 
-            self.pc = addr
-            self.cycles += 1
-    def BIT(self, addr): 
-        val = self.nes.read(addr)
-        self.set_flag(0x80, val & 0x80)
-        self.set_flag(0x40, val & 0x40)
-        self.set_flag(0x02, (self.a & val) == 0)
-    def BMI(self, addr): 
-        if self.get_flag(0x80): 
-            self.pc = addr
-            self.cycles += 1
-    def BNE(self, addr): 
-        if not self.get_flag(0x02): 
-            self.pc = addr
-            self.cycles += 1
-    def BPL(self, addr): 
-        if not self.get_flag(0x80): 
-            self.pc = addr
-            self.cycles += 1
-    def BRK(self, addr): 
-        self.push16(self.pc + 1)
-        self.push(self.status | 0x10)
-        self.set_flag(0x04, True)
-        self.pc = self.nes.read16(0xFFFE)
-    def BVC(self, addr): 
-        if not self.get_flag(0x40): 
-            self.pc = addr
-            self.cycles += 1
-    def BVS(self, addr): 
-        if self.get_flag(0x40): 
-            self.pc = addr
-            self.cycles += 1
-    def CLC(self, addr): self.set_flag(0x01, False)
-    def CLD(self, addr): self.set_flag(0x08, False)
-    def CLI(self, addr): self.set_flag(0x04, False)
-    def CLV(self, addr): self.set_flag(0x40, False)
-    def CMP(self, addr): 
-        val = self.nes.read(addr)
-        res = self.a - val
-        self.set_flag(0x01, res >= 0)
-        self.set_zn(res & 0xFF)
-    def CPX(self, addr): 
-        val = self.nes.read(addr)
-        res = self.x - val
-        self.set_flag(0x01, res >= 0)
-        self.set_zn(res & 0xFF)
-    def CPY(self, addr): 
-        val = self.nes.read(addr)
-        res = self.y - val
-        self.set_flag(0x01, res >= 0)
-        self.set_zn(res & 0xFF)
-    def DEC(self, addr): 
-        val = (self.nes.read(addr) - 1) & 0xFF
-        self.nes.write(addr, val)
-        self.set_zn(val)
-    def DEX(self, addr): 
-        self.x = (self.x - 1) & 0xFF
-        self.set_zn(self.x)
-    def DEY(self, addr): 
-        self.y = (self.y - 1) & 0xFF
-        self.set_zn(self.y)
-    def EOR(self, addr): 
-        self.a ^= self.nes.read(addr)
-        self.set_zn(self.a)
-    def INC(self, addr): 
-        val = (self.nes.read(addr) + 1) & 0xFF
-        self.nes.write(addr, val)
-        self.set_zn(val)
-    def INX(self, addr): 
-        self.x = (self.x + 1) & 0xFF
-        self.set_zn(self.x)
-    def INY(self, addr): 
-        self.y = (self.y + 1) & 0xFF
-        self.set_zn(self.y)
-    def JMP(self, addr): self.pc = addr
-    def JSR(self, addr): 
-        self.push16(self.pc - 1)
-        self.pc = addr
-    def LDA(self, addr): 
-        self.a = self.nes.read(addr)
-        self.set_zn(self.a)
-    def LDX(self, addr): 
-        self.x = self.nes.read(addr)
-        self.set_zn(self.x)
-    def LDY(self, addr): 
-        self.y = self.nes.read(addr)
-        self.set_zn(self.y)
-    def LSR(self, addr): 
-        if addr is None:  # Accumulator
-            self.set_flag(0x01, self.a & 0x01)
-            self.a >>= 1
-            self.set_zn(self.a)
-        else:
-            val = self.nes.read(addr)
-            self.set_flag(0x01, val & 0x01)
-            val >>= 1
-            self.nes.write(addr, val)
-            self.set_zn(val)
-    def NOP(self, addr): pass
-    def ORA(self, addr): 
-        self.a |= self.nes.read(addr)
-        self.set_zn(self.a)
-    def PHA(self, addr): self.push(self.a)
-    def PHP(self, addr): self.push(self.status | 0x10)
-    def PLA(self, addr): 
-        self.a = self.pop()
-        self.set_zn(self.a)
-    def PLP(self, addr): self.status = (self.pop() & 0xEF) | 0x20
-    def ROL(self, addr): 
-        carry = self.get_flag(0x01)
-        if addr is None:  # Accumulator
-            self.set_flag(0x01, self.a & 0x80)
-            self.a = ((self.a << 1) | carry) & 0xFF
-            self.set_zn(self.a)
-        else:
-            val = self.nes.read(addr)
-            self.set_flag(0x01, val & 0x80)
-            val = ((val << 1) | carry) & 0xFF
-            self.nes.write(addr, val)
-            self.set_zn(val)
-    def ROR(self, addr): 
-        carry = self.get_flag(0x01)
-        if addr is None:  # Accumulator
-            self.set_flag(0x01, self.a & 0x01)
-            self.a = (self.a >> 1) | (carry << 7)
-            self.set_zn(self.a)
-        else:
-            val = self.nes.read(addr)
-            self.set_flag(0x01, val & 0x01)
-            val = (val >> 1) | (carry << 7)
-            self.nes.write(addr, val)
-            self.set_zn(val)
-    def RTI(self, addr): 
-        self.status = (self.pop() & 0xEF) | 0x20
-        self.pc = self.pop16()
-    def RTS(self, addr): self.pc = self.pop16() + 1
-    def SBC(self, addr): 
-        val = self.nes.read(addr) ^ 0xFF
-        carry = self.get_flag(0x01)
-        res = self.a + val + carry
-        self.set_flag(0x01, res > 0xFF)
-        self.set_flag(0x40, ((self.a ^ val) & 0x80) == 0 and ((self.a ^ res) & 0x80) != 0)
-        self.a = res & 0xFF
-        self.set_zn(self.a)
-    def SEC(self, addr): self.set_flag(0x01, True)
-    def SED(self, addr): self.set_flag(0x08, True)
-    def SEI(self, addr): self.set_flag(0x04, True)
-    def STA(self, addr): self.nes.write(addr, self.a)
-    def STX(self, addr): self.nes.write(addr, self.x)
-    def STY(self, addr): self.nes.write(addr, self.y)
-    def TAX(self, addr): 
-        self.x = self.a
-        self.set_zn(self.x)
-    def TAY(self, addr): 
-        self.y = self.a
-        self.set_zn(self.y)
-    def TSX(self, addr): 
-        self.x = self.sp
-        self.set_zn(self.x)
-    def TXA(self, addr): 
-        self.a = self.x
-        self.set_zn(self.a)
-    def TXS(self, addr): self.sp = self.x
-    def TYA(self, addr): 
-        self.a = self.y
-        self.set_zn(self.a)
-
-    def build_instruction_set(self):
-        ops = [
-            (0x69, self.ADC, self.imm, 2), (0x65, self.ADC, self.zpg, 3), (0x75, self.ADC, self.zpgx, 4),
-            (0x6D, self.ADC, self.abs, 4), (0x7D, self.ADC, self.absx, 4), (0x79, self.ADC, self.absy, 4),
-            (0x61, self.ADC, self.indx, 6), (0x71, self.ADC, self.indy, 5),
-            (0x29, self.AND, self.imm, 2), (0x25, self.AND, self.zpg, 3), (0x35, self.AND, self.zpgx, 4),
-            (0x2D, self.AND, self.abs, 4), (0x3D, self.AND, self.absx, 4), (0x39, self.AND, self.absy, 4),
-            (0x21, self.AND, self.indx, 6), (0x31, self.AND, self.indy, 5),
-            (0x0A, self.ASL, None, 2), (0x06, self.ASL, self.zpg, 5), (0x16, self.ASL, self.zpgx, 6),
-            (0x0E, self.ASL, self.abs, 6), (0x1E, self.ASL, self.absx, 7),
-            (0x90, self.BCC, self.abs, 2), (0xB0, self.BCS, self.abs, 2), (0xF0, self.BEQ, self.abs, 2),
-            (0x24, self.BIT, self.zpg, 3), (0x2C, self.BIT, self.abs, 4), (0x30, self.BMI, self.abs, 2),
-            (0xD0, self.BNE, self.abs, 2), (0x10, self.BPL, self.abs, 2), (0x00, self.BRK, None, 7),
-            (0x50, self.BVC, self.abs, 2), (0x70, self.BVS, self.abs, 2), (0x18, self.CLC, None, 2),
-            (0xD8, self.CLD, None, 2), (0x58, self.CLI, None, 2), (0xB8, self.CLV, None, 2),
-            (0xC9, self.CMP, self.imm, 2), (0xC5, self.CMP, self.zpg, 3), (0xD5, self.CMP, self.zpgx, 4),
-            (0xCD, self.CMP, self.abs, 4), (0xDD, self.CMP, self.absx, 4), (0xD9, self.CMP, self.absy, 4),
-            (0xC1, self.CMP, self.indx, 6), (0xD1, self.CMP, self.indy, 5),
-            (0xE0, self.CPX, self.imm, 2), (0xE4, self.CPX, self.zpg, 3), (0xEC, self.CPX, self.abs, 4),
-            (0xC0, self.CPY, self.imm, 2), (0xC4, self.CPY, self.zpg, 3), (0xCC, self.CPY, self.abs, 4),
-            (0xC6, self.DEC, self.zpg, 5), (0xD6, self.DEC, self.zpgx, 6), (0xCE, self.DEC, self.abs, 6),
-            (0xDE, self.DEC, self.absx, 7), (0xCA, self.DEX, None, 2), (0x88, self.DEY, None, 2),
-            (0x49, self.EOR, self.imm, 2), (0x45, self.EOR, self.zpg, 3), (0x55, self.EOR, self.zpgx, 4),
-            (0x4D, self.EOR, self.abs, 4), (0x5D, self.EOR, self.absx, 4), (0x59, self.EOR, self.absy, 4),
-            (0x41, self.EOR, self.indx, 6), (0x51, self.EOR, self.indy, 5),
-            (0xE6, self.INC, self.zpg, 5), (0xF6, self.INC, self.zpgx, 6), (0xEE, self.INC, self.abs, 6),
-            (0xFE, self.INC, self.absx, 7), (0xE8, self.INX, None, 2), (0xC8, self.INY, None, 2),
-            (0x4C, self.JMP, self.abs, 3), (0x6C, self.JMP, self.ind, 5), (0x20, self.JSR, self.abs, 6),
-            (0xA9, self.LDA, self.imm, 2), (0xA5, self.LDA, self.zpg, 3), (0xB5, self.LDA, self.zpgx, 4),
-            (0xAD, self.LDA, self.abs, 4), (0xBD, self.LDA, self.absx, 4), (0xB9, self.LDA, self.absy, 4),
-            (0xA1, self.LDA, self.indx, 6), (0xB1, self.LDA, self.indy, 5),
-            (0xA2, self.LDX, self.imm, 2), (0xA6, self.LDX, self.zpg, 3), (0xB6, self.LDX, self.zpgy, 4),
-            (0xAE, self.LDX, self.abs, 4), (0xBE, self.LDX, self.absy, 4),
-            (0xA0, self.LDY, self.imm, 2), (0xA4, self.LDY, self.zpg, 3), (0xB4, self.LDY, self.zpgx, 4),
-            (0xAC, self.LDY, self.abs, 4), (0xBC, self.LDY, self.absx, 4),
-            (0x4A, self.LSR, None, 2), (0x46, self.LSR, self.zpg, 5), (0x56, self.LSR, self.zpgx, 6),
-            (0x4E, self.LSR, self.abs, 6), (0x5E, self.LSR, self.absx, 7),
-            (0xEA, self.NOP, None, 2),
-            (0x09, self.ORA, self.imm, 2), (0x05, self.ORA, self.zpg, 3), (0x15, self.ORA, self.zpgx, 4),
-            (0x0D, self.ORA, self.abs, 4), (0x1D, self.ORA, self.absx, 4), (0x19, self.ORA, self.absy, 4),
-            (0x01, self.ORA, self.indx, 6), (0x11, self.ORA, self.indy, 5),
-            (0x48, self.PHA, None, 3), (0x08, self.PHP, None, 3), (0x68, self.PLA, None, 4),
-            (0x28, self.PLP, None, 4), (0x2A, self.ROL, None, 2), (0x26, self.ROL, self.zpg, 5),
-            (0x36, self.ROL, self.zpgx, 6), (0x2E, self.ROL, self.abs, 6), (0x3E, self.ROL, self.absx, 7),
-            (0x6A, self.ROR, None, 2), (0x66, self.ROR, self.zpg, 5), (0x76, self.ROR, self.zpgx, 6),
-            (0x6E, self.ROR, self.abs, 6), (0x7E, self.ROR, self.absx, 7), (0x40, self.RTI, None, 6),
-            (0x60, self.RTS, None, 6), (0xE9, self.SBC, self.imm, 2), (0xE5, self.SBC, self.zpg, 3),
-            (0xF5, self.SBC, self.zpgx, 4), (0xED, self.SBC, self.abs, 4), (0xFD, self.SBC, self.absx, 4),
-            (0xF9, self.SBC, self.absy, 4), (0xE1, self.SBC, self.indx, 6), (0xF1, self.SBC, self.indy, 5),
-            (0x38, self.SEC, None, 2), (0xF8, self.SED, None, 2), (0x78, self.SEI, None, 2),
-            (0x85, self.STA, self.zpg, 3), (0x95, self.STA, self.zpgx, 4), (0x8D, self.STA, self.abs, 4),
-            (0x9D, self.STA, self.absx, 5), (0x99, self.STA, self.absy, 5), (0x81, self.STA, self.indx, 6),
-            (0x91, self.STA, self.indy, 6), (0x86, self.STX, self.zpg, 3), (0x96, self.STX, self.zpgy, 4),
-            (0x8E, self.STX, self.abs, 4), (0x84, self.STY, self.zpg, 3), (0x94, self.STY, self.zpgx, 4),
-            (0x8C, self.STY, self.abs, 4), (0xAA, self.TAX, None, 2), (0xA8, self.TAY, None, 2),
-            (0xBA, self.TSX, None, 2), (0x8A, self.TXA, None, 2), (0x9A, self.TXS, None, 2),
-            (0x98, self.TYA, None, 2)
-        ]
+    def run(self, until):
+        """Execute until total_cycles reaches until, a PRG basic block at a time"""
+        read = self.nes.read
+        write = self.nes.write
+        blocks = self.blocks
+        pc, a, x, y, p = self.pc, self.a, self.x, self.y, self.status
+        total = start = self.total_cycles
+        while total < until:
+            if self.interrupt_pending:
+                self.pc, self.a, self.x, self.y, self.status = pc, a, x, y, p
+                if self.service_interrupt():
+                    pc, a, x, y, p = self.pc, self.a, self.x, self.y, self.status
+                    total += 7
+                    continue
+            
+            if pc >= 0x8000:
+                block = blocks.get(pc)
+                if block is None:
+                    block = blocks[pc] = _compile_block(self, pc)
+                pc, a, x, y, p, total = block(self, read, write, a, x, y, p, total, until)
+            else:
+                # Code running from RAM may change under us: interpret it
+                pc, a, x, y, p, total = DISPATCH[read(pc)](self, read, write, pc + 1, a, x, y, p, total)
         
-        for opcode, method, addr_mode, cycles in ops:
-            self.op_table[opcode] = (method, addr_mode)
-            self.cycles_table[opcode] = cycles
+        self.pc, self.a, self.x, self.y, self.status = pc, a, x, y, p
+        self.total_cycles = total
+        self.cycles += total - start
 
-    def step(self):
+    def service_interrupt(self):
+        """Enter a pending NMI, or IRQ if unmasked; False if nothing was taken"""
         if self.nmi_pending:
             self.nmi()
             self.nmi_pending = False
-            return
-        
-        if self.irq_pending and not self.get_flag(0x04):
+        elif self.irq_pending and not (self.status & 0x04):
             self.irq()
             self.irq_pending = False
+        else:
+            # Only a masked IRQ is waiting: CLI/PLP/RTI raise the flag again
+            self.interrupt_pending = False
+            return False
+        self.interrupt_pending = self.irq_pending and not (self.status & 0x04)
+        return True
+
+    def step(self):
+        """Execute one instruction (or interrupt entry)"""
+        if self.interrupt_pending and self.service_interrupt():
+            self.total_cycles += 7
             return
+        nes = self.nes
+        start = self.total_cycles
+        (self.pc, self.a, self.x, self.y, self.status, self.total_cycles) = DISPATCH[nes.read(self.pc)](
+            self, nes.read, nes.write, self.pc + 1, self.a, self.x, self.y, self.status, start)
+        self.cycles += self.total_cycles - start
 
-        opcode = self.nes.read(self.pc)
-        self.pc += 1
-        
-        method, addr_mode = self.op_table[opcode]
-        cycles = self.cycles_table[opcode]
-        
-        if addr_mode is None:
-            addr = None
+# ══════════════════════════════════════════════════════════════
+# GENERATED CPU CORE: OPCODE DISPATCH AND BLOCK CACHE
+# ══════════════════════════════════════════════════════════════
+
+# Every opcode is generated from the tables below into a step_XX function
+# with its addressing mode and body inlined; DISPATCH holds all 256. Code
+# in PRG ROM is additionally translated a basic block at a time from the
+# same templates and cached in CPU.blocks. Registers travel as locals
+# (pc, a, x, y, p) along with the running cycle count; SP stays on self
+# since only stack ops touch it.
+
+# (opcode, mnemonic, addressing mode, base cycles)
+_OPCODES = [
+    (0x69, 'ADC', 'imm', 2), (0x65, 'ADC', 'zpg', 3), (0x75, 'ADC', 'zpgx', 4),
+    (0x6D, 'ADC', 'abs', 4), (0x7D, 'ADC', 'absx', 4), (0x79, 'ADC', 'absy', 4),
+    (0x61, 'ADC', 'indx', 6), (0x71, 'ADC', 'indy', 5),
+    (0x29, 'AND', 'imm', 2), (0x25, 'AND', 'zpg', 3), (0x35, 'AND', 'zpgx', 4),
+    (0x2D, 'AND', 'abs', 4), (0x3D, 'AND', 'absx', 4), (0x39, 'AND', 'absy', 4),
+    (0x21, 'AND', 'indx', 6), (0x31, 'AND', 'indy', 5),
+    (0x0A, 'ASL', None, 2), (0x06, 'ASL', 'zpg', 5), (0x16, 'ASL', 'zpgx', 6),
+    (0x0E, 'ASL', 'abs', 6), (0x1E, 'ASL', 'absx', 7),
+    (0x90, 'BCC', 'rel', 2), (0xB0, 'BCS', 'rel', 2), (0xF0, 'BEQ', 'rel', 2),
+    (0x24, 'BIT', 'zpg', 3), (0x2C, 'BIT', 'abs', 4), (0x30, 'BMI', 'rel', 2),
+    (0xD0, 'BNE', 'rel', 2), (0x10, 'BPL', 'rel', 2), (0x00, 'BRK', None, 7),
+    (0x50, 'BVC', 'rel', 2), (0x70, 'BVS', 'rel', 2), (0x18, 'CLC', None, 2),
+    (0xD8, 'CLD', None, 2), (0x58, 'CLI', None, 2), (0xB8, 'CLV', None, 2),
+    (0xC9, 'CMP', 'imm', 2), (0xC5, 'CMP', 'zpg', 3), (0xD5, 'CMP', 'zpgx', 4),
+    (0xCD, 'CMP', 'abs', 4), (0xDD, 'CMP', 'absx', 4), (0xD9, 'CMP', 'absy', 4),
+    (0xC1, 'CMP', 'indx', 6), (0xD1, 'CMP', 'indy', 5),
+    (0xE0, 'CPX', 'imm', 2), (0xE4, 'CPX', 'zpg', 3), (0xEC, 'CPX', 'abs', 4),
+    (0xC0, 'CPY', 'imm', 2), (0xC4, 'CPY', 'zpg', 3), (0xCC, 'CPY', 'abs', 4),
+    (0xC6, 'DEC', 'zpg', 5), (0xD6, 'DEC', 'zpgx', 6), (0xCE, 'DEC', 'abs', 6),
+    (0xDE, 'DEC', 'absx', 7), (0xCA, 'DEX', None, 2), (0x88, 'DEY', None, 2),
+    (0x49, 'EOR', 'imm', 2), (0x45, 'EOR', 'zpg', 3), (0x55, 'EOR', 'zpgx', 4),
+    (0x4D, 'EOR', 'abs', 4), (0x5D, 'EOR', 'absx', 4), (0x59, 'EOR', 'absy', 4),
+    (0x41, 'EOR', 'indx', 6), (0x51, 'EOR', 'indy', 5),
+    (0xE6, 'INC', 'zpg', 5), (0xF6, 'INC', 'zpgx', 6), (0xEE, 'INC', 'abs', 6),
+    (0xFE, 'INC', 'absx', 7), (0xE8, 'INX', None, 2), (0xC8, 'INY', None, 2),
+    (0x4C, 'JMP', 'abs', 3), (0x6C, 'JMP', 'ind', 5), (0x20, 'JSR', 'abs', 6),
+    (0xA9, 'LDA', 'imm', 2), (0xA5, 'LDA', 'zpg', 3), (0xB5, 'LDA', 'zpgx', 4),
+    (0xAD, 'LDA', 'abs', 4), (0xBD, 'LDA', 'absx', 4), (0xB9, 'LDA', 'absy', 4),
+    (0xA1, 'LDA', 'indx', 6), (0xB1, 'LDA', 'indy', 5),
+    (0xA2, 'LDX', 'imm', 2), (0xA6, 'LDX', 'zpg', 3), (0xB6, 'LDX', 'zpgy', 4),
+    (0xAE, 'LDX', 'abs', 4), (0xBE, 'LDX', 'absy', 4),
+    (0xA0, 'LDY', 'imm', 2), (0xA4, 'LDY', 'zpg', 3), (0xB4, 'LDY', 'zpgx', 4),
+    (0xAC, 'LDY', 'abs', 4), (0xBC, 'LDY', 'absx', 4),
+    (0x4A, 'LSR', None, 2), (0x46, 'LSR', 'zpg', 5), (0x56, 'LSR', 'zpgx', 6),
+    (0x4E, 'LSR', 'abs', 6), (0x5E, 'LSR', 'absx', 7),
+    (0xEA, 'NOP', None, 2),
+    (0x09, 'ORA', 'imm', 2), (0x05, 'ORA', 'zpg', 3), (0x15, 'ORA', 'zpgx', 4),
+    (0x0D, 'ORA', 'abs', 4), (0x1D, 'ORA', 'absx', 4), (0x19, 'ORA', 'absy', 4),
+    (0x01, 'ORA', 'indx', 6), (0x11, 'ORA', 'indy', 5),
+    (0x48, 'PHA', None, 3), (0x08, 'PHP', None, 3), (0x68, 'PLA', None, 4),
+    (0x28, 'PLP', None, 4), (0x2A, 'ROL', None, 2), (0x26, 'ROL', 'zpg', 5),
+    (0x36, 'ROL', 'zpgx', 6), (0x2E, 'ROL', 'abs', 6), (0x3E, 'ROL', 'absx', 7),
+    (0x6A, 'ROR', None, 2), (0x66, 'ROR', 'zpg', 5), (0x76, 'ROR', 'zpgx', 6),
+    (0x6E, 'ROR', 'abs', 6), (0x7E, 'ROR', 'absx', 7), (0x40, 'RTI', None, 6),
+    (0x60, 'RTS', None, 6), (0xE9, 'SBC', 'imm', 2), (0xE5, 'SBC', 'zpg', 3),
+    (0xF5, 'SBC', 'zpgx', 4), (0xED, 'SBC', 'abs', 4), (0xFD, 'SBC', 'absx', 4),
+    (0xF9, 'SBC', 'absy', 4), (0xE1, 'SBC', 'indx', 6), (0xF1, 'SBC', 'indy', 5),
+    (0x38, 'SEC', None, 2), (0xF8, 'SED', None, 2), (0x78, 'SEI', None, 2),
+    (0x85, 'STA', 'zpg', 3), (0x95, 'STA', 'zpgx', 4), (0x8D, 'STA', 'abs', 4),
+    (0x9D, 'STA', 'absx', 5), (0x99, 'STA', 'absy', 5), (0x81, 'STA', 'indx', 6),
+    (0x91, 'STA', 'indy', 6), (0x86, 'STX', 'zpg', 3), (0x96, 'STX', 'zpgy', 4),
+    (0x8E, 'STX', 'abs', 4), (0x84, 'STY', 'zpg', 3), (0x94, 'STY', 'zpgx', 4),
+    (0x8C, 'STY', 'abs', 4), (0xAA, 'TAX', None, 2), (0xA8, 'TAY', None, 2),
+    (0xBA, 'TSX', None, 2), (0x8A, 'TXA', None, 2), (0x9A, 'TXS', None, 2),
+    (0x98, 'TYA', None, 2)
+]
+
+# Operand fetch; indexed modes add their own page-cross cycle
+_MODES = {
+    None: "",
+    'rel': "",
+    'imm': "val = read(pc); pc += 1",
+    'zpg': "addr = read(pc); pc += 1",
+    'zpgx': "addr = (read(pc) + x) & 0xFF; pc += 1",
+    'zpgy': "addr = (read(pc) + y) & 0xFF; pc += 1",
+    'abs': "addr = read(pc) | (read(pc + 1) << 8); pc += 2",
+    'absx': ("base = read(pc) | (read(pc + 1) << 8); pc += 2\n"
+             "addr = (base + x) & 0xFFFF\n"
+             "total += ((base & 0xFF) + x) >> 8"),
+    'absy': ("base = read(pc) | (read(pc + 1) << 8); pc += 2\n"
+             "addr = (base + y) & 0xFFFF\n"
+             "total += ((base & 0xFF) + y) >> 8"),
+    # JMP ($xxFF) takes its high byte from $xx00, like the real 6502
+    'ind': ("ptr = read(pc) | (read(pc + 1) << 8); pc += 2\n"
+            "addr = read(ptr) | (read((ptr & 0xFF00) | ((ptr + 1) & 0xFF)) << 8)"),
+    'indx': ("base = (read(pc) + x) & 0xFF; pc += 1\n"
+             "addr = read(base) | (read((base + 1) & 0xFF) << 8)"),
+    'indy': ("base = read(pc); pc += 1\n"
+             "ptr = read(base) | (read((base + 1) & 0xFF) << 8)\n"
+             "addr = (ptr + y) & 0xFFFF\n"
+             "total += ((ptr & 0xFF) + y) >> 8"),
+}
+
+# Branches are branchless: taken is 0/1, so taken - 1 and -taken act as
+# all-zero/all-one masks for selecting the next PC and the +1/+2 penalty
+_BRANCH = (
+    "off = read(pc); pc += 1\n"
+    "target = (pc + (off ^ 0x80) - 0x80) & 0xFFFF\n"
+    "taken = {taken}\n"
+    "total += taken + (taken & ((((target ^ pc) & 0xFF00) + 0xFF00) >> 16))\n"
+    "pc = (pc & (taken - 1)) | (target & -taken)"
+)
+
+_SET_ZN = "p = (p & 0x7D) | (0x02 if {r} == 0 else 0) | ({r} & 0x80)"
+
+# Shifts and rotates work on A (mode None) or memory; {load}/{store} are
+# filled in per addressing mode
+_SHIFT = ("val = {{load}}\n"
+          "v = {expr}\n"
+          "{{store}}\n"
+          "p = (p & 0x7C) | {carry} | (0x02 if v == 0 else 0) | (v & 0x80)")
+
+_ADD = ("res = a + val + (p & 0x01)\n"
+        "v = res & 0xFF\n"
+        "p = ((p & 0x3C) | (res >> 8) | ((~(a ^ val) & (a ^ res) & 0x80) >> 1) |\n"
+        "     (0x02 if v == 0 else 0) | (v & 0x80))\n"
+        "a = v")
+
+_COMPARE = ("res = {r} - val\n"
+            "v = res & 0xFF\n"
+            "p = (p & 0x7C) | (res >= 0) | (0x02 if v == 0 else 0) | (v & 0x80)")
+
+_PULL = "self.sp = sp = (self.sp + 1) & 0xFF\n"
+
+# Appended to the ops that change the I flag: re-derive interrupt_pending,
+# so a masked IRQ doesn't hold the flag set and an unmasked one raises it
+_IRQ_GATE = "\nself.interrupt_pending = self.nmi_pending or (self.irq_pending and not p & 0x04)"
+
+# mnemonic: (kind, body). 'r' ops get their operand in val, 'w' ops only
+# need addr, 'm' ops read-modify-write A or memory, 'n' ops take no operand.
+_BODIES = {
+    'ADC': ('r', _ADD),
+    'SBC': ('r', "val ^= 0xFF\n" + _ADD),
+    'AND': ('r', "a &= val\n" + _SET_ZN.format(r="a")),
+    'ORA': ('r', "a |= val\n" + _SET_ZN.format(r="a")),
+    'EOR': ('r', "a ^= val\n" + _SET_ZN.format(r="a")),
+    'BIT': ('r', "p = (p & 0x3D) | (val & 0xC0) | (0x02 if (a & val) == 0 else 0)"),
+    'CMP': ('r', _COMPARE.format(r="a")),
+    'CPX': ('r', _COMPARE.format(r="x")),
+    'CPY': ('r', _COMPARE.format(r="y")),
+    'LDA': ('r', "a = val\n" + _SET_ZN.format(r="a")),
+    'LDX': ('r', "x = val\n" + _SET_ZN.format(r="x")),
+    'LDY': ('r', "y = val\n" + _SET_ZN.format(r="y")),
+    'STA': ('w', "write(addr, a)"),
+    'STX': ('w', "write(addr, x)"),
+    'STY': ('w', "write(addr, y)"),
+    'INC': ('w', "v = (read(addr) + 1) & 0xFF\nwrite(addr, v)\n" + _SET_ZN.format(r="v")),
+    'DEC': ('w', "v = (read(addr) - 1) & 0xFF\nwrite(addr, v)\n" + _SET_ZN.format(r="v")),
+    'ASL': ('m', _SHIFT.format(expr="(val << 1) & 0xFF", carry="(val >> 7)")),
+    'LSR': ('m', _SHIFT.format(expr="val >> 1", carry="(val & 0x01)")),
+    'ROL': ('m', _SHIFT.format(expr="((val << 1) | (p & 0x01)) & 0xFF", carry="(val >> 7)")),
+    'ROR': ('m', _SHIFT.format(expr="(val >> 1) | ((p & 0x01) << 7)", carry="(val & 0x01)")),
+    'INX': ('n', "x = (x + 1) & 0xFF\n" + _SET_ZN.format(r="x")),
+    'INY': ('n', "y = (y + 1) & 0xFF\n" + _SET_ZN.format(r="y")),
+    'DEX': ('n', "x = (x - 1) & 0xFF\n" + _SET_ZN.format(r="x")),
+    'DEY': ('n', "y = (y - 1) & 0xFF\n" + _SET_ZN.format(r="y")),
+    'TAX': ('n', "x = a\n" + _SET_ZN.format(r="x")),
+    'TAY': ('n', "y = a\n" + _SET_ZN.format(r="y")),
+    'TXA': ('n', "a = x\n" + _SET_ZN.format(r="a")),
+    'TYA': ('n', "a = y\n" + _SET_ZN.format(r="a")),
+    'TSX': ('n', "x = self.sp\n" + _SET_ZN.format(r="x")),
+    'TXS': ('n', "self.sp = x"),
+    'CLC': ('n', "p &= 0xFE"),
+    'CLD': ('n', "p &= 0xF7"),
+    'CLI': ('n', "p &= 0xFB" + _IRQ_GATE),
+    'CLV': ('n', "p &= 0xBF"),
+    'SEC': ('n', "p |= 0x01"),
+    'SED': ('n', "p |= 0x08"),
+    'SEI': ('n', "p |= 0x04" + _IRQ_GATE),
+    'NOP': ('n', ""),
+    'BCC': ('n', _BRANCH.format(taken="(p & 0x01) ^ 1")),
+    'BCS': ('n', _BRANCH.format(taken="p & 0x01")),
+    'BNE': ('n', _BRANCH.format(taken="((p >> 1) & 1) ^ 1")),
+    'BEQ': ('n', _BRANCH.format(taken="(p >> 1) & 1")),
+    'BPL': ('n', _BRANCH.format(taken="(p >> 7) ^ 1")),
+    'BMI': ('n', _BRANCH.format(taken="p >> 7")),
+    'BVC': ('n', _BRANCH.format(taken="((p >> 6) & 1) ^ 1")),
+    'BVS': ('n', _BRANCH.format(taken="(p >> 6) & 1")),
+    'JMP': ('w', "pc = addr"),
+    'JSR': ('w', ("ret = pc - 1\n"
+                  "sp = self.sp\n"
+                  "write(0x100 + sp, ret >> 8)\n"
+                  "write(0x100 + ((sp - 1) & 0xFF), ret & 0xFF)\n"
+                  "self.sp = (sp - 2) & 0xFF\n"
+                  "pc = addr")),
+    'RTS': ('n', ("sp = self.sp\n"
+                  "pc = (read(0x100 + ((sp + 1) & 0xFF)) | (read(0x100 + ((sp + 2) & 0xFF)) << 8)) + 1\n"
+                  "self.sp = (sp + 2) & 0xFF")),
+    'RTI': ('n', ("sp = self.sp\n"
+                  "p = (read(0x100 + ((sp + 1) & 0xFF)) & 0xEF) | 0x20\n"
+                  "pc = read(0x100 + ((sp + 2) & 0xFF)) | (read(0x100 + ((sp + 3) & 0xFF)) << 8)\n"
+                  "self.sp = (sp + 3) & 0xFF" + _IRQ_GATE)),
+    'BRK': ('n', ("ret = pc + 1\n"
+                  "sp = self.sp\n"
+                  "write(0x100 + sp, (ret >> 8) & 0xFF)\n"
+                  "write(0x100 + ((sp - 1) & 0xFF), ret & 0xFF)\n"
+                  "write(0x100 + ((sp - 2) & 0xFF), p | 0x10)\n"
+                  "self.sp = (sp - 3) & 0xFF\n"
+                  "p |= 0x04\n"
+                  "pc = self.nes.read16(0xFFFE)")),
+    'PHA': ('n', "write(0x100 + self.sp, a)\nself.sp = (self.sp - 1) & 0xFF"),
+    'PHP': ('n', "write(0x100 + self.sp, p | 0x10)\nself.sp = (self.sp - 1) & 0xFF"),
+    'PLA': ('n', _PULL + "a = read(0x100 + sp)\n" + _SET_ZN.format(r="a")),
+    'PLP': ('n', _PULL + "p = (read(0x100 + sp) & 0xEF) | 0x20" + _IRQ_GATE),
+}
+
+_OPS = {op: (name, mode, cycles) for op, name, mode, cycles in _OPCODES}
+
+# Bytes per instruction, by addressing mode
+_SIZES = {None: 1, 'rel': 2, 'imm': 2, 'zpg': 2, 'zpgx': 2, 'zpgy': 2,
+          'abs': 3, 'absx': 3, 'absy': 3, 'ind': 3, 'indx': 2, 'indy': 2}
+
+# Instructions that can change PC end a compiled block
+_BLOCK_END = {'BCC', 'BCS', 'BNE', 'BEQ', 'BPL', 'BMI', 'BVC', 'BVS',
+              'JMP', 'JSR', 'RTS', 'RTI', 'BRK'}
+
+# Upper bound on instructions per block, which bounds how far a block can
+# overshoot a run() target (and delay a pending NMI)
+_BLOCK_MAX = 16
+
+def _op_source(opcode):
+    """Statements for one opcode and its base cycle count"""
+    # Unofficial opcodes execute as 1-byte NOPs
+    name, mode, cycles = _OPS.get(opcode, ('NOP', None, 2))
+    kind, body = _BODIES[name]
+    operand = _MODES[mode]
+    if kind == 'r' and mode != 'imm':
+        operand += "\nval = read(addr)"
+    elif kind == 'm':
+        body = body.format(load="a" if mode is None else "read(addr)",
+                           store="a = v" if mode is None else "write(addr, v)")
+    return "\n".join(filter(None, [operand, body])), cycles
+
+def _emit_step(opcode):
+    """Emit step_XX: one whole instruction, returning the updated registers"""
+    src, cycles = _op_source(opcode)
+    lines = [f"def step_{opcode:02X}(self, read, write, pc, a, x, y, p, total):",
+             f"    # {_OPS.get(opcode, ('NOP',))[0]} ${opcode:02X}"]
+    lines.extend("    " + line for line in src.split("\n") if line)
+    lines.append(f"    return pc, a, x, y, p, total + {cycles}")
+    return lines
+
+def _compile_dispatch():
+    """Build DISPATCH, the 256 step functions indexed by opcode"""
+    steps = [line for op in range(256) for line in _emit_step(op) + [""]]
+    src = "\n".join(steps) + "\nDISPATCH = (" + ", ".join(f"step_{op:02X}" for op in range(256)) + ")\n"
+    ns = {}
+    exec(compile(src, '<cpu-core>', 'exec'), ns)
+    return ns['DISPATCH']
+
+DISPATCH = _compile_dispatch()
+
+def _compile_block(cpu, start):
+    """Translate the PRG basic block at start into one straight-line function
+
+    Operand bytes are read from PRG at translation time and pasted in as
+    literals, and PC is only materialized where an instruction uses it.
+    A block ending in a branch or JMP back to its own start (a polling or
+    idle loop) repeats inside the function until until or an interrupt.
+    """
+    prg, mask = cpu.nes._prg, cpu.nes._prg_mask
+    lines = []
+    pc, cycles, next_pc, target = start, 0, None, None
+    for _ in range(_BLOCK_MAX):
+        opcode = prg[pc & mask]
+        name, mode, _ = _OPS.get(opcode, ('NOP', None, 2))
+        size = _SIZES[mode]
+        src, base = _op_source(opcode)
+        if pc + size <= 0x10000:
+            lo, hi = prg[(pc + 1) & mask], prg[(pc + 2) & mask]
+            src = src.replace("read(pc + 1)", f"0x{hi:02X}").replace("read(pc)", f"0x{lo:02X}")
+            src = src.replace("; pc += 1", "").replace("; pc += 2", "")
+            pc += size
+            # Only materialize PC for instructions that read it
+            if "pc" in src.replace("pc =", ""):
+                src = f"pc = 0x{pc:04X}\n" + src
         else:
-            addr = addr_mode()
-        
-        method(addr)
-        
-        self.cycles += cycles + self.extra_cycles
-        self.total_cycles += cycles + self.extra_cycles
-        self.extra_cycles = 0
+            # Operands wrap past $FFFF: keep the generic fetches
+            src = f"pc = 0x{pc + 1:04X}\n" + src
+            pc += size
+        lines.append(f"# {name} ${opcode:02X}")
+        lines.extend(line for line in src.split("\n") if line)
+        cycles += base
+        if name in _BLOCK_END:
+            next_pc = "pc"
+            if mode == 'rel' and pc <= 0xFFFF:
+                target = (pc + (lo ^ 0x80) - 0x80) & 0xFFFF
+            elif opcode == 0x4C and pc <= 0xFFFF:
+                target = lo | (hi << 8)
+            break
+        if pc > 0xFFFF:
+            break
+    if target == start:
+        lines = (["def block(self, read, write, a, x, y, p, total, until):",
+                  "    while True:"]
+                 + ["        " + line for line in lines]
+                 + [f"        total += {cycles}",
+                    f"        if pc != 0x{start:04X} or total >= until or self.interrupt_pending:",
+                    "            return pc, a, x, y, p, total"])
+    else:
+        lines = (["def block(self, read, write, a, x, y, p, total, until):"]
+                 + ["    " + line for line in lines]
+                 + [f"    return {next_pc or f'0x{pc:04X}'}, a, x, y, p, total + {cycles}"])
+    ns = {}
+    exec(compile("\n".join(lines), f'<block ${start:04X}>', 'exec'), ns)
+    return ns['block']
 
 # ══════════════════════════════════════════════════════════════
 # ENHANCED PPU IMPLEMENTATION
 # ══════════════════════════════════════════════════════════════
 
 class PPU:
-    __slots__ = ('nes', 'vram', 'palette', 'oam', 'cycle', 'scanline', 'frame', 
+    __slots__ = ('nes', 'vram', 'vram_map', 'palette', 'palette_lookup', 'oam', 'oam_y', 'oam_tile', 'oam_attr', 'oam_x',
+                 'sprite_rows', 'sprite_rows_height',
+                 'tile_pixels', 'dot', 'scanline', 'frame', 
                  'ctrl', 'mask', 'status', 'oam_addr', 'v', 't', 'x', 'w', 
-                 'nmi_occurred', 'front_buffer', 'back_buffer')
+                 'nmi_occurred', 'buffer', 'front_buffer', 'back_buffer')
     
     def __init__(self, nes):
         self.nes = nes
-        self.vram = [0] * 0x4000
-        self.palette = [0] * 32
-        self.oam = [0] * 256
-        self.cycle = 0
+        self.vram = bytearray(0x4000)
+        self.vram_map = array.array('H', [0]) * 0x1000
+        self.build_vram_map(0)
+        self.palette = bytearray(32)
+        # RGB bytes for each palette RAM entry, kept in step with palette writes
+        self.palette_lookup = [self.nes_rgb[0]] * 32
+        self.oam = bytearray(256)
+        # Per-field copies of OAM (struct-of-arrays) for sprite evaluation
+        self.oam_y = bytearray(64)
+        self.oam_tile = bytearray(64)
+        self.oam_attr = bytearray(64)
+        self.oam_x = bytearray(64)
+        # Sprites on each scanline, rebuilt when OAM or the sprite size changes
+        self.sprite_rows = None
+        self.sprite_rows_height = 0
+        # Pattern tables pre-decoded to one 2-bit color per byte, 64 per tile
+        self.tile_pixels = bytearray(512 * 64)
+        self.dot = 0  # Frame dot at which the current scanline began
         self.scanline = 0
         self.frame = 0
         self.ctrl = self.mask = self.status = 0
         self.oam_addr = 0
         self.v = self.t = self.x = self.w = 0
         self.nmi_occurred = False
-        self.front_buffer = [0] * (256 * 240)
-        self.back_buffer = [0] * (256 * 240)
+        self.buffer = 0
+        # Packed 24-bit RGB rows, ready to hand to Tk as PPM pixel data
+        self.front_buffer = bytearray(256 * 240 * 3)
+        self.back_buffer = bytearray(256 * 240 * 3)
 
     def read(self, addr):
         addr &= 0x3FFF
         if addr < 0x2000:
             return self.nes.chr_read(addr)
         elif addr < 0x3F00:
-            return self.vram[self.mirror_vram(addr)]
+            return self.vram[self.vram_map[addr & 0x0FFF]]
         elif addr < 0x4000:
-            return self.palette[self.mirror_palette(addr)]
+            return self.palette[self.palette_map[addr & 0x1F]]
         return 0
 
     def write(self, addr, val):
@@ -515,25 +566,40 @@ class PPU:
         if addr < 0x2000:
             self.nes.chr_write(addr, val)
         elif addr < 0x3F00:
-            self.vram[self.mirror_vram(addr)] = val
+            self.vram[self.vram_map[addr & 0x0FFF]] = val
         elif addr < 0x4000:
-            self.palette[self.mirror_palette(addr)] = val
-
-    def mirror_vram(self, addr):
-        addr = (addr - 0x2000) & 0x0FFF
-        mirror = self.nes.mirroring
-        if mirror == 0:  # Horizontal
-            if addr < 0x0800: return addr & 0x03FF
-            else: return (addr & 0x03FF) + 0x0400
-        else:  # Vertical
-            if addr < 0x0800: return addr & 0x03FF
-            else: return addr & 0x03FF
-
-    def mirror_palette(self, addr):
-        addr = (addr - 0x3F00) & 0x1F
-        if addr >= 16 and (addr % 4) == 0:
-            addr -= 16
-        return addr
+            idx = self.palette_map[addr & 0x1F]
+            self.palette[idx] = val
+            self.palette_lookup[idx] = self.nes_rgb[val & 0x3F]
+
+    def build_vram_map(self, mirroring):
+        """Map each $2000-$2FFF offset to its nametable byte for the cart's mirroring"""
+        for addr in range(0x1000):
+            if mirroring == 0:  # Horizontal: $2000=$2400, $2800=$2C00
+                self.vram_map[addr] = (addr & 0x03FF) | ((addr & 0x0800) >> 1)
+            else:  # Vertical: $2000=$2800, $2400=$2C00
+                self.vram_map[addr] = addr & 0x07FF
+
+    # Pixel color 0-3 -> palette index for each of the 4 background palettes
+    attr_luts = tuple(bytes((pal << 2) | c if c else 0 for c in range(256)) for pal in range(4))
+
+    # $3F10/$3F14/$3F18/$3F1C alias the backdrop entries below them
+    palette_map = bytes(i - 16 if i >= 16 and i % 4 == 0 else i for i in range(32))
+
+    def decode_row(self, addr):
+        """Re-expand the 8-pixel pattern row holding CHR address addr"""
+        chr_mem = self.nes._chr
+        addr &= 0x1FF7  # Plane 0 byte of the row
+        plane0 = chr_mem[addr]
+        plane1 = chr_mem[addr + 8] << 1
+        base = ((addr >> 4) << 6) | ((addr & 7) << 3)
+        for bit in range(8):
+            self.tile_pixels[base + bit] = ((plane0 >> (7 - bit)) & 1) | ((plane1 >> (7 - bit)) & 2)
+
+    def decode_tiles(self):
+        for tile in range(0, 0x2000, 16):
+            for row in range(8):
+                self.decode_row(tile + row)
 
     def write_control(self, val):
         self.ctrl = val
@@ -552,8 +618,20 @@ class PPU:
         self.oam_addr = val
 
     def write_oam_data(self, val):
-        self.oam[self.oam_addr] = val
-        self.oam_addr = (self.oam_addr + 1) & 0xFF
+        addr = self.oam_addr
+        self.oam[addr] = val
+        (self.oam_y, self.oam_tile, self.oam_attr, self.oam_x)[addr & 3][addr >> 2] = val
+        self.sprite_rows_height = 0
+        self.oam_addr = (addr + 1) & 0xFF
+
+    def sync_oam(self):
+        """Refresh the per-field OAM arrays after a bulk write (OAM DMA)"""
+        oam = self.oam
+        self.oam_y[:] = oam[0::4]
+        self.oam_tile[:] = oam[1::4]
+        self.oam_attr[:] = oam[2::4]
+        self.oam_x[:] = oam[3::4]
+        self.sprite_rows_height = 0
 
     def read_oam_data(self):
         return self.oam[self.oam_addr]
@@ -592,120 +670,175 @@ class PPU:
         self.write(self.v, val)
         self.v += 32 if (self.ctrl & 4) else 1
 
-    def tick(self):
-        if self.scanline < 240:
-            if self.cycle < 256:
-                self.render_pixel()
-        elif self.scanline == 241 and self.cycle == 1:
+    def read_register(self, addr):
+        reg = addr & 7
+        if reg == 2:
+            return self.read_status()
+        elif reg == 7:
+            return self.read_data()
+        elif reg == 4:
+            return self.read_oam_data()
+        return 0
+
+    def write_register(self, addr, val):
+        reg = addr & 7
+        if reg == 7:
+            self.write_data(val)
+        elif reg == 6:
+            self.write_address(val)
+        elif reg == 5:
+            self.write_scroll(val)
+        elif reg == 0:
+            self.write_control(val)
+        elif reg == 1:
+            self.write_mask(val)
+        elif reg == 4:
+            self.write_oam_data(val)
+        elif reg == 3:
+            self.write_oam_addr(val)
+
+    def run_until(self, dot):
+        """Catch up to the given dot of the frame, one whole scanline at a time"""
+        while self.dot + 341 <= dot:
+            self.dot += 341
+            self.end_scanline()
+
+    def sync_dot(self):
+        """Dot the CPU may run up to before the PPU has to catch up: the end of
+        the current scanline, or the end of vblank, whose lines change nothing"""
+        line = self.scanline
+        if 241 <= line < 261:
+            return self.dot + 341 * (261 - line)
+        return self.dot + 341
+
+    def end_scanline(self):
+        line = self.scanline
+        rendering = self.mask & 0x18
+        if line < 240:
+            if rendering:
+                self.render_scanline(line)
+                self.next_line()
+            else:
+                self.back_buffer[line * 768:(line + 1) * 768] = self.palette_lookup[0] * 256
+        elif line == 261 and rendering:
+            self.v = self.t  # Pre-render line reloads the full scroll
+        
+        line += 1
+        if line == 241:
             self.status |= 0x80
             if self.ctrl & 0x80:
                 self.nmi_occurred = True
                 self.nes.cpu.nmi_pending = True
-        
-        self.cycle += 1
-        if self.cycle >= 341:
-            self.cycle = 0
-            self.scanline += 1
-            if self.scanline >= 262:
-                self.scanline = 0
-                self.frame += 1
-                self.front_buffer, self.back_buffer = self.back_buffer, self.front_buffer
-
-    def render_pixel(self):
-        x, y = self.cycle - 1, self.scanline
-        if x < 0 or x >= 256 or y < 0 or y >= 240:
-            return
-        
-        bg_color = self.render_background()
-        sprite_color, sprite_priority = self.render_sprites()
-        
-        if (self.mask & 0x08) and (self.mask & 0x10):
-            if sprite_color and (not sprite_priority or not bg_color):
-                color = sprite_color
-            else:
-                color = bg_color
-        elif self.mask & 0x08:
-            color = bg_color
-        elif self.mask & 0x10:
-            color = sprite_color
+                self.nes.cpu.interrupt_pending = True
+        elif line == 262:
+            line = 0
+            self.status &= 0x1F
+            self.frame += 1
+            self.front_buffer, self.back_buffer = self.back_buffer, self.front_buffer
+        self.scanline = line
+
+    def next_line(self):
+        # Dot 256/257 scroll updates: increment fine/coarse Y, reload coarse X
+        v = self.v
+        if (v & 0x7000) != 0x7000:
+            v += 0x1000
         else:
-            color = 0
-        
-        palette_idx = self.read(0x3F00 + color) & 0x3F
-        self.back_buffer[y * 256 + x] = self.nes_palette[palette_idx]
+            v &= 0x0FFF
+            coarse_y = (v >> 5) & 0x1F
+            if coarse_y == 29:
+                v = (v & 0x7C1F) ^ 0x0800
+            elif coarse_y == 31:
+                v &= 0x7C1F
+            else:
+                v += 0x20
+        self.v = (v & 0x7BE0) | (self.t & 0x041F)
+
+    def render_scanline(self, y):
+        line = self.render_background() if self.mask & 0x08 else bytearray(256)
+        if self.mask & 0x10:
+            self.render_sprites(y, line)
+        self.back_buffer[y * 768:(y + 1) * 768] = b''.join(map(self.palette_lookup.__getitem__, line))
 
     def render_background(self):
-        if not (self.mask & 0x08):
-            return 0
-        
-        fine_x = (self.v & 0x1F) >> 12
-        fine_y = (self.v >> 2) & 0x07
-        tile_x = (self.v >> 5) & 0x1F
-        tile_y = (self.v >> 10) & 0x1F
-        nametable = (self.v >> 8) & 0x03
-        
-        attr_addr = 0x23C0 | (nametable << 10) | ((tile_y // 4) << 3) | (tile_x // 4)
-        attr = self.read(attr_addr)
-        shift = ((tile_y & 2) << 1) | (tile_x & 2)
-        palette = (attr >> shift) & 3
+        """Palette indices (0 = backdrop) for the 256 pixels of the current line"""
+        v = self.v
+        fine_y = (v >> 12) & 7
+        tile_base = (0x100 if (self.ctrl & 0x10) else 0) * 64 + fine_y * 8
+        pixels, vram, vram_map, luts = self.tile_pixels, self.vram, self.vram_map, self.attr_luts
+        tiles = []
         
-        tile_addr = (0x1000 if (self.ctrl & 0x10) else 0x0000) + \
-                   self.read(0x2000 | (nametable << 10) | (tile_y << 5) | tile_x) * 16
-        plane0 = self.read(tile_addr + fine_y)
-        plane1 = self.read(tile_addr + fine_y + 8)
-        
-        bit = 7 - fine_x
-        color = ((plane1 >> bit) & 1) << 1 | ((plane0 >> bit) & 1)
-        return palette << 2 | color if color else 0
-
-    def render_sprites(self):
-        if not (self.mask & 0x10):
-            return 0, False
+        # One nametable/attribute fetch per tile; its 8 pre-decoded pixels
+        # are colored in a single translate through the attribute's LUT
+        for _ in range(33):
+            tile = vram[vram_map[v & 0x0FFF]]
+            attr = vram[vram_map[0x03C0 | (v & 0x0C00) | ((v >> 4) & 0x38) | ((v >> 2) & 0x07)]]
+            base = tile_base + tile * 64
+            tiles.append(pixels[base:base + 8].translate(luts[(attr >> (((v >> 4) & 4) | (v & 2))) & 3]))
+            # Coarse X increment, wrapping into the neighbouring nametable
+            if (v & 0x1F) == 31:
+                v = (v & 0xFFE0) ^ 0x0400
+            else:
+                v += 1
         
+        return bytearray(b''.join(tiles)[self.x:self.x + 256])
+
+    def bucket_sprites(self, sprite_height):
+        """Sort sprite indices into the scanlines they cover, in OAM order"""
+        rows = [[] for _ in range(240)]
+        for i, top in enumerate(self.oam_y):
+            for y in range(top + 1, min(top + 1 + sprite_height, 240)):
+                rows[y].append(i)
+        self.sprite_rows = rows
+        self.sprite_rows_height = sprite_height
+
+    def evaluate_sprites(self, y, sprite_height):
+        """Indices of the first 8 sprites on scanline y, setting overflow past that"""
+        if self.sprite_rows_height != sprite_height:
+            self.bucket_sprites(sprite_height)
+        active = self.sprite_rows[y]
+        if len(active) > 8:
+            self.status |= 0x20
+            return active[:8]
+        return active
+
+    def render_sprites(self, y, line):
+        """Overlay the (up to 8) sprites on scanline y onto line in place"""
         sprite_height = 16 if (self.ctrl & 0x20) else 8
-        sprite_count = 0
+        active = self.evaluate_sprites(y, sprite_height)
+        if not active:
+            return
         
-        for i in range(64):
-            y_pos = self.oam[i * 4]
-            if y_pos > 239: continue
-            
-            tile_idx = self.oam[i * 4 + 1]
-            attr = self.oam[i * 4 + 2]
-            x_pos = self.oam[i * 4 + 3]
-            
-            if not (x_pos <= self.cycle - 1 < x_pos + 8):
-                continue
-            
-            sprite_count += 1
-            if sprite_count > 8:
-                self.status |= 0x20
-                break
-            
-            rel_x = (self.cycle - 1) - x_pos
-            rel_y = (self.scanline - y_pos - 1) % sprite_height
-            
-            if attr & 0x40: rel_x = 7 - rel_x
-            if attr & 0x80: rel_y = sprite_height - 1 - rel_y
+        pixels = self.tile_pixels
+        oam_y, oam_tile, oam_attr, oam_x = self.oam_y, self.oam_tile, self.oam_attr, self.oam_x
+        bg = bytes(line)
+        taken = bytearray(256)
+        
+        for i in active:
+            rel_y = y - oam_y[i] - 1
+            tile_idx, attr, x_pos = oam_tile[i], oam_attr[i], oam_x[i]
+            if attr & 0x80:
+                rel_y = sprite_height - 1 - rel_y
             
             if sprite_height == 16:
-                bank = (tile_idx & 1) * 0x1000
-                tile_idx = (tile_idx & 0xFE) | (rel_y & 0x08)
-            else:
-                bank = 0x1000 if (self.ctrl & 0x08) else 0x0000
+                tile_idx = ((tile_idx & 1) << 8) | ((tile_idx & 0xFE) + (rel_y >> 3))
+            elif self.ctrl & 0x08:
+                tile_idx |= 0x100
             
-            tile_addr = bank + tile_idx * 16 + (rel_y & 0x07)
-            plane0 = self.read(tile_addr)
-            plane1 = self.read(tile_addr + 8)
+            base = tile_idx * 64 + (rel_y & 0x07) * 8
+            flip = 7 if (attr & 0x40) else 0  # Horizontal flip via index XOR
+            palette = 0x10 | ((attr & 3) << 2)
+            behind = attr & 0x20
             
-            bit = 7 - rel_x
-            color = ((plane1 >> bit) & 1) << 1 | ((plane0 >> bit) & 1)
-            if color == 0: continue
-            
-            palette = 0x10 + ((attr & 3) << 2) + color
-            priority = bool(attr & 0x20)
-            return palette, priority
-        
-        return 0, False
+            for rel_x in range(min(8, 256 - x_pos)):
+                color = pixels[base + (rel_x ^ flip)]
+                px = x_pos + rel_x
+                if not color or taken[px]:
+                    continue
+                taken[px] = 1
+                if i == 0 and bg[px] and px < 255:
+                    self.status |= 0x40  # Sprite 0 hit
+                if not (behind and bg[px]):
+                    line[px] = palette | color
 
     nes_palette = [
         0x666666, 0x002A88, 0x1412A7, 0x3B00A4, 0x5C007E, 0x6E0040, 0x6C0600, 0x561D00,
@@ -717,21 +850,27 @@ class PPU:
         0xFFFEFF, 0xC0DFFF, 0xD3D2FF, 0xE8C8FF, 0xFBC2FF, 0xFEC4EA, 0xFECCC5, 0xF7D8A5,
         0xE4E594, 0xCFEF96, 0xBDF4AB, 0xB3F3CC, 0xB5EBF2, 0xB8B8B8, 0x000000, 0x000000
     ]
+    # The same colors as the 3-byte RGB runs written into the framebuffer
+    nes_rgb = tuple(c.to_bytes(3, 'big') for c in nes_palette)
 
 # ══════════════════════════════════════════════════════════════
 # NES CONSOLE
 # ══════════════════════════════════════════════════════════════
 
 class NES:
-    __slots__ = ('cpu', 'ppu', 'wram', 'rom', 'mirroring', 'frame_count')
+    __slots__ = ('cpu', 'ppu', 'wram', 'rom', 'mirroring', 'frame_count',
+                 '_prg', '_prg_mask', '_chr')
     
     def __init__(self):
         self.cpu = CPU(self)
         self.ppu = PPU(self)
-        self.wram = [0] * 0x800
+        self.wram = bytearray(0x800)
         self.rom = None
         self.mirroring = 0
         self.frame_count = 0
+        self._prg = memoryview(bytes(0x8002))
+        self._prg_mask = 0x7FFF
+        self._chr = memoryview(bytearray(0x2000))
 
     def load_rom(self, rom_data):
         if rom_data[0:3] != b'NES':
@@ -741,29 +880,45 @@ class NES:
         chr_banks = rom_data[5]
         flags6 = rom_data[6]
         self.mirroring = flags6 & 1
+        self.ppu.build_vram_map(self.mirroring)
         
         prg_start = 16
         chr_start = prg_start + prg_banks * 16384
         
         self.rom = {
             'prg': rom_data[prg_start:chr_start],
-            'chr': rom_data[chr_start:chr_start + chr_banks * 8192]
+            'chr': bytearray(rom_data[chr_start:chr_start + chr_banks * 8192] or 8192)  # CHR-RAM if none
         }
         
+        # CPU-visible $8000-$FFFF window, 16KB carts mirrored, so a PRG
+        # read is a single mask + index with no modulo
+        prg = self.rom['prg']
+        if not prg:
+            raise ValueError("ROM has no PRG data")
+        # 2 wrap-around bytes at the end let the CPU core fetch operands
+        # at offset + 1 / + 2 without masking again
+        window = (prg * (0x8000 // len(prg) + 1))[:0x8000]
+        self._prg = memoryview(window + window[:2])
+        self._prg_mask = 0x7FFF
+        self.cpu.blocks.clear()
+        self._chr = memoryview(self.rom['chr'])
+        self.ppu.decode_tiles()
+        
         self.cpu.reset()
         sys_bus.rom_loaded = True
         print(f"[NES] ROM Loaded | PRG: {prg_banks} | CHR: {chr_banks} | Mirroring: {'Vertical' if self.mirroring else 'Horizontal'}")
 
     def read(self, addr):
-        addr &= 0xFFFF
-        if addr < 0x2000:
+        addr &= 0xFFFF  # Operand fetches and read16 can run past $FFFF
+        # Ordered by frequency: PRG ROM, then WRAM, then I/O
+        if addr >= 0x8000:
+            return self._prg[addr & self._prg_mask]
+        elif addr < 0x2000:
             return self.wram[addr & 0x7FF]
         elif addr < 0x4000:
-            return self.ppu.read(addr & 7)
+            return self.ppu.read_register(addr)
         elif addr == 0x4016:
             return 0  # Input placeholder
-        elif addr >= 0x8000:
-            return self.rom['prg'][(addr - 0x8000) % len(self.rom['prg'])]
         return 0
 
     def write(self, addr, val):
@@ -772,42 +927,57 @@ class NES:
         if addr < 0x2000:
             self.wram[addr & 0x7FF] = val
         elif addr < 0x4000:
-            self.ppu.write(addr & 7, val)
+            self.ppu.write_register(addr, val)
         elif addr == 0x4014:
             self.dma_transfer(val)
         elif addr == 0x4016:
             pass  # Input placeholder
+        elif addr >= 0x8000:
+            self.cpu.blocks.clear()  # Mapper/bank write: compiled PRG is stale
 
     def read16(self, addr):
+        # Vectors and absolute operands live in PRG: two direct indexes, no dispatch
+        if 0x8000 <= addr < 0xFFFF:
+            off = addr & self._prg_mask
+            return self._prg[off] | (self._prg[off + 1] << 8)
         return self.read(addr) | (self.read(addr + 1) << 8)
 
     def chr_read(self, addr):
-        if self.rom['chr']:
-            return self.rom['chr'][addr % len(self.rom['chr'])]
-        return 0
+        return self._chr[addr]
 
     def chr_write(self, addr, val):
-        if not self.rom['chr']:
-            return
-        self.rom['chr'][addr % len(self.rom['chr'])] = val
+        self._chr[addr] = val
+        self.ppu.decode_row(addr)
 
     def dma_transfer(self, page):
         addr = page << 8
-        for i in range(256):
-            self.ppu.oam[i] = self.read(addr + i)
+        # The source page is almost always WRAM or PRG: copy it as one slice
+        if addr < 0x2000:
+            off = addr & 0x7FF
+            self.ppu.oam[:] = self.wram[off:off + 256]
+        elif addr >= 0x8000:
+            off = addr & self._prg_mask
+            self.ppu.oam[:] = self._prg[off:off + 256]
+        else:
+            self.ppu.oam[:] = bytes(self.read(addr + i) for i in range(256))
+        self.ppu.sync_oam()
         self.cpu.cycles += 513
 
     def run_frame(self):
         target_cycles = 29781  # NES frames per CPU cycle ratio
+        if sys_bus.paused:
+            return
         
-        while self.cpu.total_cycles < target_cycles:
-            if not sys_bus.paused:
-                self.cpu.step()
-            
-            for _ in range(3):  # PPU runs 3x faster than CPU
-                self.ppu.tick()
+        cpu, ppu = self.cpu, self.ppu
+        # Run the CPU up to the end of the PPU's current scanline (3 dots
+        # per CPU cycle), or through the rest of vblank in one go, then have
+        # the PPU process those whole lines at once
+        while cpu.total_cycles < target_cycles:
+            cpu.run(min((ppu.sync_dot() + 2) // 3, target_cycles))
+            ppu.run_until(cpu.total_cycles * 3)
         
-        self.cpu.total_cycles -= target_cycles
+        cpu.total_cycles -= target_cycles
+        ppu.dot -= target_cycles * 3
         self.frame_count += 1
 
 # ══════════════════════════════════════════════════════════════
@@ -815,6 +985,8 @@ class NES:
 # ══════════════════════════════════════════════════════════════
 
 class FCEUXGUI:
+    PPM_HEADER = b'P6 256 240 255\n'
+
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Cat's FCEUX 0.1.1B")
@@ -825,6 +997,9 @@ class FCEUXGUI:
         self.setup_gui()
         self.running = False
         self.emulation_thread = None
+        self.stop_event = threading.Event()  # Wakes the emulation thread to stop
+        self.frame_ready = threading.Event()  # Set by the emulation thread, blitted by Tk
+        self.display_job = None
 
     def setup_gui(self):
         # Main frame
@@ -839,6 +1014,8 @@ class FCEUXGUI:
         # Display canvas
         self.canvas = Canvas(main_frame, width=256, height=240, bg='#000000')
         self.canvas.pack(pady=10)
+        self.photo = tk.PhotoImage(width=256, height=240)
+        self.image_id = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
         
         # Controls frame
         controls = Frame(main_frame, bg='#2b2b2b')
@@ -886,30 +1063,58 @@ class FCEUXGUI:
 
     def start_emulation(self):
         self.running = True
+        self.stop_event.clear()
         self.emulation_thread = threading.Thread(target=self.emulation_loop, daemon=True)
         self.emulation_thread.start()
+        self.poll_display()
 
     def stop_emulation(self):
         self.running = False
+        self.stop_event.set()
+        if self.display_job:
+            self.root.after_cancel(self.display_job)
+            self.display_job = None
         if self.emulation_thread:
             self.emulation_thread.join(timeout=1.0)
 
     def emulation_loop(self):
+        frame_time = 1.0 / 60.0988  # NTSC frame rate
+        deadline = time.perf_counter()
+        last_digest = None
         while self.running:
             self.nes.run_frame()
             if self.nes.frame_count % 2 == 0:  # Limit update rate
-                self.update_display()
-            time.sleep(0.001)  # Prevent excessive CPU usage
+                # Static screens (menus, pauses) don't need another blit
+                digest = hashlib.blake2b(self.nes.ppu.front_buffer, digest_size=8).digest()
+                if digest != last_digest:
+                    last_digest = digest
+                    self.frame_ready.set()
+            # Sleep until the next frame is due; stop_emulation cuts the wait short
+            deadline += frame_time
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                if self.stop_event.wait(delay):
+                    break
+            elif delay < -frame_time:
+                deadline = time.perf_counter()  # Running behind: don't try to catch up
+
+    def poll_display(self):
+        # Tk is only touched from the main thread: the emulation thread just
+        # flags finished frames and this timer blits them
+        if not self.running:
+            return
+        if self.frame_ready.is_set():
+            self.frame_ready.clear()
+            self.update_display()
+        self.display_job = self.root.after(8, self.poll_display)
 
     def update_display(self):
         if not self.running:
             return
         
-        img_data = bytes(self.nes.ppu.front_buffer)
-        self.photo = tk.PhotoImage(width=256, height=240)
-        self.photo.put(" ".join(f"#{c:06x}" for c in self.nes.ppu.front_buffer), to=(0, 0, 255, 239))
-        self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
-        self.root.update_idletasks()
+        # One binary PPM blob per frame (a single header + frame concatenation),
+        # decoded by Tk into the same photo
+        self.photo.configure(data=self.PPM_HEADER + self.nes.ppu.front_buffer, format='PPM')
 
     def open_console(self):
         if not sys_bus.console_active:
@@ -25,20 +25,32 @@ class NES_Mirroring(IntEnum):
     FOUR_SCREEN = 2
 
 class FCEUX_Core:
+    AUDIO_RING_SIZE = 4096  # Samples; a power of two so positions are a mask
+    
     def __init__(self, video_callback, audio_callback):
         self.video_callback = video_callback
         self.audio_callback = audio_callback
         self.ram = bytearray(0x0800)  # 2KB NES RAM
         self.vram = bytearray(0x2000) # 8KB VRAM
         self.palette = bytearray(0x20) # 32-color palette
+        self.frame_buffer = bytearray(256 * 240 * 3)  # Reused RGB output frame
+        
+        # Background LUTs, updated on $2007 writes so rendering is a plain lookup
+        self.name_lut = bytearray(0x1000)  # Tile index per nametable cell
+        self.attr_lut = bytearray(0x1000)  # Palette (0-3) per nametable cell
         self.rom_data = None
+        self.cpu_space = bytearray(0x10000)  # Cartridge side of the CPU bus, PRG mirrored in
         self.mapper_type = NES_MapperType.iNES
+        self.mapper = 0
         self.mirroring = NES_Mirroring.HORIZONTAL
         
         # Math module integration for emulation accuracy [citation:2][citation:10]
         self.frame_time = 1.0 / 60.0988  # NTSC frame timing
         self.audio_sample_rate = 44100
         self.audio_clock = 0.0
+        # Time of each sample within a frame, relative to the frame's audio_clock
+        self.audio_offsets = tuple(i / self.audio_sample_rate
+                                   for i in range(int(self.audio_sample_rate * self.frame_time)))
         
         # Controller state
         self.controller1 = 0
@@ -58,9 +70,13 @@ class FCEUX_Core:
         self.ppu_mask = 0
         self.ppu_status = 0
         self.ppu_scroll = (0, 0)
+        self.ppu_addr = 0
+        self.ppu_addr_latch = False
         
-        # APU state
-        self.audio_buffer = deque(maxlen=4096)
+        # APU state: ring buffer of int16 samples, with free-running write/read counters
+        self.audio_ring = array.array('h', bytes(2 * self.AUDIO_RING_SIZE))
+        self.audio_w = 0
+        self.audio_r = 0
     
     def load_rom(self, rom_data):
         """Load NES ROM file"""
@@ -68,18 +84,23 @@ class FCEUX_Core:
         
         # Parse iNES header [citation:8]
         if len(rom_data) >= 16:
-            header = rom_data[:16]
-            if header[0:4] == b'NES\x1A':
+            magic, prg_banks, chr_banks, flags6, flags7 = struct.unpack_from('<4sBBBB', rom_data, 0)
+            if magic == b'NES\x1A':
                 self.mapper_type = NES_MapperType.iNES
-                prg_rom_size = header[4] * 16384  # PRG-ROM size
-                chr_rom_size = header[5] * 8192   # CHR-ROM size
+                prg_rom_size = prg_banks * 16384  # PRG-ROM size
+                chr_rom_size = chr_banks * 8192   # CHR-ROM size
                 
                 # Parse mirroring and mapper info
-                flags6 = header[6]
+                self.mapper = (flags7 & 0xF0) | (flags6 >> 4)
                 self.mirroring = NES_Mirroring.FOUR_SCREEN if (flags6 & 0x08) else (
                     NES_Mirroring.VERTICAL if (flags6 & 0x01) else NES_Mirroring.HORIZONTAL
                 )
                 
+                # Map PRG into $8000-$FFFF once, mirroring 16 KiB carts
+                prg = rom_data[16:16 + prg_rom_size]
+                if prg:
+                    self.cpu_space[0x8000:] = (prg * (0x8000 // len(prg) + 1))[:0x8000]
+                
                 print(f"Loaded ROM: {prg_rom_size} bytes PRG, {chr_rom_size} bytes CHR")
                 return True
         
@@ -92,21 +113,18 @@ class FCEUX_Core:
         if address < 0x2000:
             return self.ram[address & 0x07FF]  # RAM mirroring
         
-        elif address < 0x4000:
-            return self.ppu_read_register(0x2000 + (address & 7))
-        
-        elif address == 0x4016:
-            return self.read_controller(1)
-        
-        elif address == 0x4017:
-            return self.read_controller(2)
-        
-        elif address >= 0x8000 and self.rom_data:
-            # ROM access - simplified mapper
-            rom_addr = (address - 0x8000) % len(self.rom_data)
-            return self.rom_data[rom_addr] if rom_addr < len(self.rom_data) else 0
+        elif address < 0x4020:
+            # I/O window: PPU registers, APU and controllers
+            if address < 0x4000:
+                return self.ppu_read_register(0x2000 + (address & 7))
+            elif address == 0x4016:
+                return self.read_controller(1)
+            elif address == 0x4017:
+                return self.read_controller(2)
+            return 0
         
-        return 0
+        # Cartridge space - simplified mapper, PRG prebuilt at load time
+        return self.cpu_space[address]
     
     def cpu_write(self, address, value):
         """CPU memory write operation"""
@@ -129,6 +147,7 @@ class FCEUX_Core:
         if reg == 2:  # PPUSTATUS
             status = self.ppu_status
             self.ppu_status &= 0x7F  # Clear vblank flag
+            self.ppu_addr_latch = False  # Reset the $2006 write toggle
             return status
         
         return 0
@@ -143,6 +162,47 @@ class FCEUX_Core:
             self.ppu_mask = value
         elif reg == 5:  # PPUSCROLL
             pass  # Simplified scroll handling
+        elif reg == 6:  # PPUADDR
+            if self.ppu_addr_latch:
+                self.ppu_addr = (self.ppu_addr & 0x3F00) | value
+            else:
+                self.ppu_addr = ((value & 0x3F) << 8) | (self.ppu_addr & 0xFF)
+            self.ppu_addr_latch = not self.ppu_addr_latch
+        elif reg == 7:  # PPUDATA
+            self.poke_vram(self.ppu_addr, value)
+            self.ppu_addr = (self.ppu_addr + (32 if self.ppu_ctrl & 0x04 else 1)) & 0x3FFF
+    
+    # Nametable cells covered by each attribute byte, with the shift that
+    # selects their 2-bit palette: ((offset, shift), ...) per byte
+    ATTR_CELLS = tuple(
+        tuple(((ty << 5) | tx, ((ty & 2) << 1) | (tx & 2))
+              for ty in range((cell >> 3) * 4, (cell >> 3) * 4 + 4) if ty < 30
+              for tx in range((cell & 7) * 4, (cell & 7) * 4 + 4))
+        for cell in range(64)
+    )
+    
+    def poke_vram(self, address, value):
+        """PPU memory write, keeping the background LUTs in sync"""
+        address &= 0x3FFF
+        
+        if address < 0x2000:
+            self.vram[address] = value  # Pattern tables
+        
+        elif address < 0x3F00:
+            offset = address & 0x0FFF
+            table, cell = offset & 0x0C00, offset & 0x03FF
+            if cell < 0x3C0:
+                self.name_lut[offset] = value
+            else:
+                attr_lut = self.attr_lut
+                for tile, shift in self.ATTR_CELLS[cell - 0x3C0]:
+                    attr_lut[table | tile] = (value >> shift) & 3
+        
+        else:
+            index = address & 0x1F
+            if (index & 0x13) == 0x10:
+                index &= 0x0F  # Sprite backdrop entries mirror the BG ones
+            self.palette[index] = value
     
     def read_controller(self, controller_num):
         """Read controller state"""
@@ -165,65 +225,91 @@ class FCEUX_Core:
         else:
             self.controller2 = buttons
     
-    def emulate_frame(self):
-        """Emulate one frame of NES execution"""
+    def emulate_frame(self, out=None, offset=0):
+        """Emulate one frame of NES execution, rendering into out if given"""
         # Simplified frame emulation - would integrate full FCEUX timing [citation:8]
         self.frame_count += 1
         
         # Generate simple test pattern for video
-        self.render_frame()
+        self.render_frame(out, offset)
         
         # Generate audio samples using math functions for waveforms [citation:2][citation:10]
         self.generate_audio()
         
         return True
     
-    def render_frame(self):
-        """Render one frame of video"""
+    def render_frame(self, out=None, offset=0):
+        """Render one frame of RGB video into out starting at offset
+        
+        Without a caller-owned target the frame goes to frame_buffer and is
+        handed to video_callback.
+        """
         width, height = 256, 240
-        frame_data = bytearray(width * height * 3)
+        frame_data = self.frame_buffer if out is None else out
+        end = offset + width * height * 3
+        f = self.frame_count
         
         # Generate test pattern using mathematical functions [citation:10]
-        for y in range(height):
-            for x in range(width):
-                idx = (y * width + x) * 3
-                
-                # Use math functions for pattern generation [citation:2]
-                r = int(128 + 127 * math.sin(x * 0.1 + self.frame_count * 0.1))
-                g = int(128 + 127 * math.cos(y * 0.1 + self.frame_count * 0.1))
-                b = int(128 + 127 * math.sin((x + y) * 0.05 + self.frame_count * 0.2))
-                
-                frame_data[idx] = r      # Red
-                frame_data[idx + 1] = g  # Green  
-                frame_data[idx + 2] = b  # Blue
+        # Red varies only with x, green only with y and blue only with x + y,
+        # so one trig call per column/row/diagonal fills whole channel planes
+        r = bytes(int(128 + 127 * math.sin(x * 0.1 + f * 0.1)) for x in range(width))
+        g = bytes(int(128 + 127 * math.cos(y * 0.1 + f * 0.1)) for y in range(height))
+        b = bytes(int(128 + 127 * math.sin(d * 0.05 + f * 0.2)) for d in range(width + height - 1))
         
-        if self.video_callback:
+        frame_data[offset:end:3] = r * height                                               # Red
+        frame_data[offset + 1:end:3] = b''.join(g[y:y + 1] * width for y in range(height))  # Green
+        frame_data[offset + 2:end:3] = b''.join(b[y:y + width] for y in range(height))      # Blue
+        
+        if out is None and self.video_callback:
             self.video_callback(frame_data, width, height)
     
     def generate_audio(self):
         """Generate audio samples"""
-        samples_per_frame = int(self.audio_sample_rate * self.frame_time)
-        
-        for i in range(samples_per_frame):
-            # Generate square wave audio using math functions
-            time_pos = self.audio_clock + i / self.audio_sample_rate
-            frequency = 440  # A4 note
-            
-            # Use math.fmod for precise timing [citation:2]
-            phase = math.fmod(time_pos * frequency, 1.0)
-            sample = 0.3 * (1.0 if phase < 0.5 else -1.0)  # Square wave
-            
-            # Apply envelope using exponential functions [citation:10]
-            envelope = math.exp(-time_pos * 0.1) if time_pos < 1.0 else 0.1
-            sample *= envelope
-            
-            self.audio_buffer.append(sample)
+        clock = self.audio_clock
+        exp = math.exp
+        frequency = 440  # A4 note
+        times = [clock + offset for offset in self.audio_offsets]
+        
+        # Square wave (float % matches math.fmod for positive times [citation:2])
+        # shaped by an exponential envelope [citation:10] that settles at 0.1,
+        # quantized straight to signed 16-bit PCM
+        if clock >= 1.0:
+            high = int(0.3 * 0.1 * 32767)
+            samples = array.array('h', (
+                high if t * frequency % 1.0 < 0.5 else -high for t in times))
+        else:
+            samples = array.array('h', (
+                int((0.3 if t * frequency % 1.0 < 0.5 else -0.3)
+                    * (exp(-t * 0.1) if t < 1.0 else 0.1) * 32767)
+                for t in times))
+        self.write_audio(samples)
         
         self.audio_clock += self.frame_time
         
-        if self.audio_callback and len(self.audio_buffer) >= 1024:
-            samples = [self.audio_buffer.popleft() for _ in range(min(1024, len(self.audio_buffer)))]
-            self.audio_callback(samples)
+        if self.audio_callback and self.audio_w - self.audio_r >= 1024:
+            self.audio_callback(self.read_audio(1024))
+    
+    def write_audio(self, samples):
+        """Append samples to the ring, overwriting the oldest once it is full"""
+        ring, size = self.audio_ring, self.AUDIO_RING_SIZE
+        samples = samples[-size:]
+        n = len(samples)
+        pos = self.audio_w & (size - 1)
+        first = min(n, size - pos)
+        ring[pos:pos + first] = samples[:first]
+        ring[:n - first] = samples[first:]
+        self.audio_w += n
+        self.audio_r = max(self.audio_r, self.audio_w - size)
+    
+    def read_audio(self, count):
+        """Remove and return up to count of the oldest samples as an array"""
+        ring, size = self.audio_ring, self.AUDIO_RING_SIZE
+        count = min(count, self.audio_w - self.audio_r)
+        pos = self.audio_r & (size - 1)
+        self.audio_r += count
+        if pos + count <= size:
+            return ring[pos:pos + count]
+        return ring[pos:] + ring[:pos + count - size]
 
 # ============================================================
 #   Enhanced Tkinter GUI with FCEUX Features
@@ -259,6 +345,13 @@ class FCEUX_GUI:
         # Video display
         self.canvas = tk.Canvas(main_frame, width=256, height=240, bg="black")
         self.canvas.pack(side=tk.TOP, padx=5, pady=5)
+        self.photo = tk.PhotoImage(width=256, height=240)
+        self.image_id = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+        
+        # PPM blob owned by the GUI; the core renders straight into its pixel area
+        header = b"P6\n256 240\n255\n"
+        self.ppm_frame = bytearray(header) + bytearray(256 * 240 * 3)
+        self.ppm_offset = len(header)
         
         # Control frame
         control_frame = ttk.Frame(main_frame)
@@ -286,6 +379,7 @@ class FCEUX_GUI:
         # Performance monitoring
         self.frame_times = deque(maxlen=60)
         self.last_frame_time = time.time()
+        self.next_deadline = time.time()
     
     def setup_controller_bindings(self):
         """Setup keyboard bindings for controller input"""
@@ -301,21 +395,25 @@ class FCEUX_GUI:
             'Right': 0x80,  # RIGHT
         }
         
-        for key, button in self.key_bindings.items():
-            self.root.bind(f'<KeyPress-{key}>', lambda e, b=button: self.key_pressed(b))
-            self.root.bind(f'<KeyRelease-{key}>', lambda e, b=button: self.key_released(b))
+        # One handler per event type, looking the button up by keysym
+        self.root.bind('<KeyPress>', self.key_pressed)
+        self.root.bind('<KeyRelease>', self.key_released)
         
         self.controller_state = 0
     
-    def key_pressed(self, button):
+    def key_pressed(self, event):
         """Handle key press for controller"""
-        self.controller_state |= button
-        self.nes.set_controller_state(1, self.controller_state)
+        button = self.key_bindings.get(event.keysym)
+        if button:
+            self.controller_state |= button
+            self.nes.controller1 = self.controller_state
     
-    def key_released(self, button):
+    def key_released(self, event):
         """Handle key release for controller"""
-        self.controller_state &= ~button
-        self.nes.set_controller_state(1, self.controller_state)
+        button = self.key_bindings.get(event.keysym)
+        if button:
+            self.controller_state &= ~button
+            self.nes.controller1 = self.controller_state
     
     def open_rom(self):
         """Open and load NES ROM file"""
@@ -362,9 +460,13 @@ class FCEUX_GUI:
             return
         
         current_time = time.time()
+        if current_time - self.next_deadline > self.nes.frame_time:
+            self.next_deadline = current_time  # Resumed or running behind: don't catch up
         
         # Emulate one frame
-        if self.nes.emulate_frame():
+        if self.nes.emulate_frame(self.ppm_frame, self.ppm_offset):
+            self.show_frame()
+            
             # Calculate and display FPS using math functions [citation:10]
             self.frame_times.append(current_time - self.last_frame_time)
             self.last_frame_time = current_time
@@ -373,21 +475,27 @@ class FCEUX_GUI:
                 fps = 1.0 / (sum(self.frame_times) / len(self.frame_times))
                 self.status_var.set(f"FPS: {fps:.1f} - Frame: {self.nes.frame_count}")
         
-        # Schedule next frame (aim for 60 FPS)
-        self.root.after(16, self.run_emulation)  # ~60 FPS
+        # Schedule the next frame for its NTSC deadline rather than a fixed delay
+        self.next_deadline += self.nes.frame_time
+        delay_ms = max(1, int((self.next_deadline - time.time()) * 1000))
+        self.root.after(delay_ms, self.run_emulation)
+    
+    def show_frame(self):
+        """Display the frame the core rendered into ppm_frame"""
+        try:
+            self.photo.configure(data=bytes(self.ppm_frame), format='PPM')
+        
+        except Exception as e:
+            print(f"Video error: {e}")
     
     def video_output(self, frame_data, width, height):
         """Handle video output from emulator core"""
         # Convert RGB data to PhotoImage and display
         try:
-            self.photo = tk.PhotoImage(width=width, height=height)
-            
-            # Convert frame data to hex string for PhotoImage
-            hex_data = " ".join(f"#{frame_data[i]:02x}{frame_data[i+1]:02x}{frame_data[i+2]:02x}" 
-                              for i in range(0, len(frame_data), 3))
+            # Wrap the raw RGB frame in a binary PPM header so Tk decodes it in C
+            header = f"P6\n{width} {height}\n255\n".encode()
+            self.photo.configure(data=header + frame_data, format='PPM')
             
-            self.photo.put(hex_data, (0, 0, width-1, height-1))
-            self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
             self.canvas.config(width=width, height=height)
         
         except Exception as e:
@@ -395,6 +503,8 @@ class FCEUX_GUI:
     
     def audio_output(self, samples):
         """Handle audio output from emulator core"""
+        # samples is an array('h') of signed 16-bit mono PCM; samples.tobytes()
+        # can go straight to a paInt16 / int16 raw output stream
         # Audio output would be implemented with pygame or similar
         pass
 
@@ -402,15 +512,16 @@ class FCEUX_GUI:
 #   Mathematical Optimization Functions [citation:2][citation:10]
 # ============================================================
 
+# APU pulse/triangle frequency for every 11-bit timer period value
+_APU_FREQ_LUT = tuple(1789772.5 / (16 * (v + 1)) if v else 0 for v in range(0x800))
+
 class NES_Math_Optimizer:
     """Mathematical optimizations for NES emulation"""
     
     @staticmethod
     def calculate_apu_frequency(register_value):
-        """Calculate APU frequency from register value using math.log"""
-        if register_value == 0:
-            return 0
-        return 1789772.5 / (16 * (register_value + 1))
+        """Calculate APU frequency from an 11-bit timer register value"""
+        return _APU_FREQ_LUT[register_value & 0x7FF]
     
     @staticmethod
     def apply_audio_filter(samples, cutoff_freq, sample_rate=44100):
@@ -419,9 +530,14 @@ class NES_Math_Optimizer:
         dt = 1.0 / sample_rate
         alpha = dt / (rc + dt)
         
-        filtered = [samples[0]]
-        for i in range(1, len(samples)):
-            filtered.append(filtered[-1] + alpha * (samples[i] - filtered[-1]))
+        # The recurrence is serial, so keep the running output in a local
+        # rather than re-indexing filtered[-1] twice per sample
+        y = samples[0]
+        filtered = [y]
+        append = filtered.append
+        for sample in samples[1:]:
+            y += alpha * (sample - y)
+            append(y)
         
         return filtered
     
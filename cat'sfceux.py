@@ -6,7 +6,8 @@
 #  GUI: Native Tkinter | 600x400 Display
 # ══════════════════════════════════════════════════════════════
 
-import struct, time, os, threading, sys, math, random
+import struct, time, os, threading, queue, sys, math, random
+from array import array
 import tkinter as tk
 from tkinter import filedialog, messagebox, Menu, Frame, Canvas, Label
 
@@ -17,17 +18,39 @@ from tkinter import filedialog, messagebox, Menu, Frame, Canvas, Label
 class SystemBus:
     """Inter-thread communication bus"""
     def __init__(self):
-        self.console_active = False
+        # Set while the emulator may run; cleared while the god console owns it
+        self.run_event = threading.Event()
+        self.run_event.set()
+        # Held by the emulation thread while it runs a frame
+        self.emu_lock = threading.Lock()
         self.rom_loaded = False
         self.debug_mode = False
         self.paused = False
         self.frame_skip = 0
+        # Notified whenever paused or run_event changes
+        self.state_changed = threading.Condition()
+
+    def can_run(self):
+        """True unless paused or held by the god console"""
+        return not self.paused and self.run_event.is_set()
+
+    def wait_until_runnable(self):
+        """Block while paused or held by the god console"""
+        with self.state_changed:
+            self.state_changed.wait_for(self.can_run)
+
+    def notify_state(self):
+        """Wake threads blocked in wait_until_runnable"""
+        with self.state_changed:
+            self.state_changed.notify_all()
 
 sys_bus = SystemBus()
 
 def god_console(nes):
     """Developer console with full system access"""
-    sys_bus.console_active = True
+    sys_bus.run_event.clear()
+    with sys_bus.emu_lock:
+        pass  # Wait out the frame in flight
     print("\n" + "═"*60)
     print(" ⚡ CAT'S FCEUX 0.1.1B GOD CONSOLE")
     print("    Variables: 'nes', 'cpu', 'ppu', 'mem'")
@@ -58,7 +81,7 @@ def god_console(nes):
                 print("CPU RESET")
             elif cmd == "dump":
                 print(f"PC: ${nes.cpu.pc:04X} | A: ${nes.cpu.a:02X} | X: ${nes.cpu.x:02X} | Y: ${nes.cpu.y:02X}")
-                print(f"SP: ${nes.cpu.sp:02X} | Status: {bin(nes.cpu.status)[2:].zfill(8)}")
+                print(f"SP: ${nes.cpu.sp:02X} | Status: {nes.cpu.status:08b}")
             elif cmd == "state":
                 print(f"Frame: {nes.frame_count} | Cycles: {nes.cpu.total_cycles}")
                 print(f"ROM: {'LOADED' if sys_bus.rom_loaded else 'NONE'}")
@@ -68,15 +91,84 @@ def god_console(nes):
         except Exception as e:
             print(f"❌ Error: {e}")
             
-    sys_bus.console_active = False
+    sys_bus.run_event.set()
+    sys_bus.notify_state()
 
 # ══════════════════════════════════════════════════════════════
 # COMPLETE 6502 CPU IMPLEMENTATION
 # ══════════════════════════════════════════════════════════════
 
+# Byte -> palette index (low 6 bits), for bytes.translate
+COLOR_MASK = bytes(i & 0x3F for i in range(256))
+
+# CPU.pending bits: interrupts waiting to be taken
+PENDING_NMI = 0x01
+PENDING_IRQ = 0x02
+
+# Little-endian 16-bit word at an offset into a buffer
+U16 = struct.Struct('<H').unpack_from
+
+# Branch offset byte -> signed displacement
+SBYTE = tuple(i if i < 128 else i - 256 for i in range(256))
+
+def _build_adc_table():
+    """ADC results for every (carry, A, operand): low byte is the new A,
+    high byte the N, V, Z and C flags. SBC uses it with the operand inverted."""
+    table = array('H', bytes(2 * 0x20000))
+    i = 0
+    for carry in (0, 1):
+        for a in range(256):
+            for val in range(256):
+                result = a + val + carry
+                r = result & 0xFF
+                flags = ((result >> 8) | (((a ^ result) & (val ^ result) & 0x80) >> 1)
+                         | (0x02 if r == 0 else 0) | (r & 0x80))
+                table[i] = r | (flags << 8)
+                i += 1
+    return table
+
+# Indexed by (carry << 16) | (A << 8) | operand
+ADC_TABLE = _build_adc_table()
+
+# Block cache: a PRG address is compiled once run() has entered it
+# BLOCK_HOT times, into at most BLOCK_MAX instructions of straight-line code
+BLOCK_HOT = 16
+BLOCK_MAX = 32
+
+# Conditional branches, with the test that takes them
+BRANCH_TAKEN = {'op_bcc': "not self.status & 0x01", 'op_bcs': "self.status & 0x01",
+                'op_bne': "not self.status & 0x02", 'op_beq': "self.status & 0x02",
+                'op_bpl': "not self.status & 0x80", 'op_bmi': "self.status & 0x80",
+                'op_bvc': "not self.status & 0x40", 'op_bvs': "self.status & 0x40"}
+
+# Handlers that read or redirect PC end a block
+BLOCK_END = set(BRANCH_TAKEN) | {'op_jmp', 'op_jsr', 'op_rts', 'op_rti', 'op_brk'}
+
+# Superinstructions: common 6502 pairs compiled as one unit
+# INX/INY/DEX/DEY + BNE/BEQ test the new register value directly
+STEP_REG = {'op_inx': ('x', '+'), 'op_iny': ('y', '+'), 'op_dex': ('x', '-'), 'op_dey': ('y', '-')}
+# CMP/CPX/CPY #imm + BNE/BEQ test for equality directly
+COMPARE_REG = {'op_cmp': 'a', 'op_cpx': 'x', 'op_cpy': 'y'}
+# LDA/LDX/LDY #imm + STA/STX/STY to RAM store a constant
+LOAD_REG = {'op_lda': 'a', 'op_ldx': 'x', 'op_ldy': 'y'}
+STORE_REG = {'op_sta': 'a', 'op_stx': 'x', 'op_sty': 'y'}
+
+# Operand bytes per addressing mode (branches take one)
+OPERAND_SIZE = {None: 0, 'addr_imm': 1, 'addr_zp': 1, 'addr_zpx': 1, 'addr_zpy': 1,
+                'addr_abs': 2, 'addr_absx': 2, 'addr_absy': 2, 'addr_ind': 2,
+                'addr_indx': 1, 'addr_indy': 1}
+
 class CPU:
     def __init__(self, nes):
         self.nes = nes
+        # Direct views of RAM and PRG: operand fetches, zero page pointers
+        # and the stack never need the bus's I/O decoding
+        self._ram = nes.wram
+        self._prg = nes.prg_rom
+        # Bus accessors, bound once
+        self.read = nes.read
+        self.write = nes.write
+        self.read16 = nes.read16
         # Registers
         self.a = 0      # Accumulator
         self.x = 0      # Index X
@@ -87,24 +179,43 @@ class CPU:
         
         # Timing
         self.cycles = 0
-        self.extra_cycles = 0
         self.total_cycles = 0
         
-        # Interrupt flags
-        self.nmi_pending = False
-        self.irq_pending = False
+        # Interrupt flags (PENDING_* bits), zero on the fast path
+        self.pending = 0
+        
+        # Compiled PRG blocks by entry address, and entry counts for the rest
+        self.blocks = {}
+        self.block_hits = {}
         
         # Build instruction table
         self.op_table = [None] * 256
         self.cycles_table = [0] * 256
         self.build_instruction_set()
         
+        # Fused (op, addr, cycles) per opcode; illegal opcodes run as 2-cycle NOPs
+        self.dispatch = tuple(
+            (entry[0], entry[1], cycles) if entry else (self.op_nop, None, 2)
+            for entry, cycles in zip(self.op_table, self.cycles_table))
+        
+        # Globals for compiled blocks: the bound handlers, RAM and the CPU
+        self.block_globals = {name: getattr(self, name) for name in dir(CPU)
+                              if name.startswith(('op_', 'addr_'))}
+        self.block_globals['self'] = self
+        self.block_globals['ram'] = self._ram
+        
+        # One specialized function per opcode, run by step() and run()
+        self.handlers = self.build_handlers()
+        
     def reset(self):
         """Hardware reset"""
         self.a = self.x = self.y = 0
         self.sp = 0xFD
         self.status = 0x24
-        self.pc = self.nes.read16(0xFFFC)
+        self._prg = self.nes.prg_rom  # Replaced when a ROM is loaded
+        self.blocks = {}
+        self.block_hits = {}
+        self.pc = self.read16(0xFFFC)
         self.cycles = 7
         self.total_cycles = 0
         print(f"[CPU] RESET | Entry Point: ${self.pc:04X}")
@@ -112,30 +223,20 @@ class CPU:
     # ═══════════════════════════════════════════════════════
     # STATUS FLAGS (NV-BDIZC)
     # ═══════════════════════════════════════════════════════
-    def get_flag(self, mask): 
-        return 1 if (self.status & mask) else 0
-    
-    def set_flag(self, mask, val):
-        if val: 
-            self.status |= mask
-        else: 
-            self.status &= ~mask
-    
     def set_zn(self, val):
         """Set Zero and Negative flags"""
-        self.set_flag(0x02, val == 0)       # Z
-        self.set_flag(0x80, val & 0x80)     # N
+        self.status = (self.status & 0x7D) | (0x02 if val == 0 else 0) | (val & 0x80)
 
     # ═══════════════════════════════════════════════════════
     # STACK OPERATIONS
     # ═══════════════════════════════════════════════════════
     def push(self, val): 
-        self.nes.write(0x100 + self.sp, val & 0xFF)
+        self._ram[0x100 + self.sp] = val & 0xFF
         self.sp = (self.sp - 1) & 0xFF
     
     def pop(self): 
         self.sp = (self.sp + 1) & 0xFF
-        return self.nes.read(0x100 + self.sp)
+        return self._ram[0x100 + self.sp]
     
     def push16(self, val): 
         self.push((val >> 8) & 0xFF)
@@ -153,17 +254,17 @@ class CPU:
         """Non-Maskable Interrupt"""
         self.push16(self.pc)
         self.push(self.status & ~0x10)  # B flag clear
-        self.set_flag(0x04, 1)  # I flag
-        self.pc = self.nes.read16(0xFFFA)
+        self.status |= 0x04  # I flag
+        self.pc = self.read16(0xFFFA)
         self.cycles = 7
 
     def irq(self):
         """Interrupt Request"""
-        if not self.get_flag(0x04):  # If I flag clear
+        if not self.status & 0x04:  # If I flag clear
             self.push16(self.pc)
             self.push(self.status & ~0x10)
-            self.set_flag(0x04, 1)
-            self.pc = self.nes.read16(0xFFFE)
+            self.status |= 0x04
+            self.pc = self.read16(0xFFFE)
             self.cycles = 7
 
     # ═══════════════════════════════════════════════════════
@@ -174,92 +275,81 @@ class CPU:
         self.pc += 1
         return addr
     
+    def fetch8(self):
+        """Operand byte at PC, straight from PRG when running from ROM"""
+        pc = self.pc
+        self.pc = pc + 1
+        if 0x8000 <= pc <= 0xFFFF:
+            return self._prg[pc - 0x8000]
+        return self.read(pc)
+    
+    def fetch16(self):
+        """Little-endian operand word at PC"""
+        pc = self.pc
+        self.pc = pc + 2
+        if 0x8000 <= pc < 0xFFFF:
+            return U16(self._prg, pc - 0x8000)[0]
+        if pc < 0x1FFF:
+            ram = self._ram
+            return (ram[(pc + 1) & 0x7FF] << 8) | ram[pc & 0x7FF]
+        return self.read16(pc)
+    
     def addr_zp(self): 
-        addr = self.nes.read(self.pc)
-        self.pc += 1
-        return addr & 0xFF
+        return self.fetch8()
     
     def addr_zpx(self): 
-        addr = (self.nes.read(self.pc) + self.x) & 0xFF
-        self.pc += 1
-        return addr
+        return (self.fetch8() + self.x) & 0xFF
     
     def addr_zpy(self): 
-        addr = (self.nes.read(self.pc) + self.y) & 0xFF
-        self.pc += 1
-        return addr
+        return (self.fetch8() + self.y) & 0xFF
     
     def addr_abs(self): 
-        lo = self.nes.read(self.pc)
-        self.pc += 1
-        hi = self.nes.read(self.pc)
-        self.pc += 1
-        return (hi << 8) | lo
+        return self.fetch16()
     
+    # Indexed modes with a page-cross penalty return (address, extra cycles)
     def addr_absx(self): 
-        lo = self.nes.read(self.pc)
-        self.pc += 1
-        hi = self.nes.read(self.pc)
-        self.pc += 1
-        base = (hi << 8) | lo
-        addr = (base + self.x) & 0xFFFF
-        if (addr & 0xFF00) != (base & 0xFF00):
-            self.extra_cycles = 1
-        return addr
+        base = self.fetch16()
+        addr = base + self.x
+        return addr & 0xFFFF, 1 if addr > (base | 0xFF) else 0
     
     def addr_absy(self): 
-        lo = self.nes.read(self.pc)
-        self.pc += 1
-        hi = self.nes.read(self.pc)
-        self.pc += 1
-        base = (hi << 8) | lo
-        addr = (base + self.y) & 0xFFFF
-        if (addr & 0xFF00) != (base & 0xFF00):
-            self.extra_cycles = 1
-        return addr
+        base = self.fetch16()
+        addr = base + self.y
+        return addr & 0xFFFF, 1 if addr > (base | 0xFF) else 0
     
     def addr_ind(self):
         """Indirect for JMP only"""
-        lo = self.nes.read(self.pc)
-        self.pc += 1
-        hi = self.nes.read(self.pc)
-        self.pc += 1
-        ptr = (hi << 8) | lo
+        ptr = self.fetch16()
         # Bug in 6502: Page boundary wrap
-        if lo == 0xFF:
-            return self.nes.read(ptr) | (self.nes.read(ptr & 0xFF00) << 8)
+        if (ptr & 0xFF) == 0xFF:
+            read = self.read
+            return read(ptr) | (read(ptr & 0xFF00) << 8)
         else:
-            return self.nes.read(ptr) | (self.nes.read(ptr + 1) << 8)
+            return self.read16(ptr)
     
     def addr_indx(self): 
-        zp = (self.nes.read(self.pc) + self.x) & 0xFF
-        self.pc += 1
-        lo = self.nes.read(zp)
-        hi = self.nes.read((zp + 1) & 0xFF)
-        return (hi << 8) | lo
+        zp = (self.fetch8() + self.x) & 0xFF
+        ram = self._ram
+        return (ram[(zp + 1) & 0xFF] << 8) | ram[zp]
     
     def addr_indy(self): 
-        zp = self.nes.read(self.pc)
-        self.pc += 1
-        lo = self.nes.read(zp)
-        hi = self.nes.read((zp + 1) & 0xFF)
-        base = (hi << 8) | lo
-        addr = (base + self.y) & 0xFFFF
-        if (addr & 0xFF00) != (base & 0xFF00):
-            self.extra_cycles = 1
-        return addr
+        zp = self.fetch8()
+        ram = self._ram
+        base = (ram[(zp + 1) & 0xFF] << 8) | ram[zp]
+        addr = base + self.y
+        return addr & 0xFFFF, 1 if addr > (base | 0xFF) else 0
 
     # ═══════════════════════════════════════════════════════
     # INSTRUCTION IMPLEMENTATIONS
     # ═══════════════════════════════════════════════════════
     
     # Load/Store
-    def op_lda(self, addr): self.a = self.nes.read(addr); self.set_zn(self.a)
-    def op_ldx(self, addr): self.x = self.nes.read(addr); self.set_zn(self.x)
-    def op_ldy(self, addr): self.y = self.nes.read(addr); self.set_zn(self.y)
-    def op_sta(self, addr): self.nes.write(addr, self.a)
-    def op_stx(self, addr): self.nes.write(addr, self.x)
-    def op_sty(self, addr): self.nes.write(addr, self.y)
+    def op_lda(self, addr): self.a = self.read(addr); self.set_zn(self.a)
+    def op_ldx(self, addr): self.x = self.read(addr); self.set_zn(self.x)
+    def op_ldy(self, addr): self.y = self.read(addr); self.set_zn(self.y)
+    def op_sta(self, addr): self.write(addr, self.a)
+    def op_stx(self, addr): self.write(addr, self.x)
+    def op_sty(self, addr): self.write(addr, self.y)
     
     # Transfer
     def op_tax(self): self.x = self.a; self.set_zn(self.x)
@@ -276,64 +366,56 @@ class CPU:
     def op_plp(self): self.status = (self.pop() & 0xEF) | 0x20
     
     # Logic
-    def op_and(self, addr): self.a &= self.nes.read(addr); self.set_zn(self.a)
-    def op_ora(self, addr): self.a |= self.nes.read(addr); self.set_zn(self.a)
-    def op_eor(self, addr): self.a ^= self.nes.read(addr); self.set_zn(self.a)
+    def op_and(self, addr): self.a &= self.read(addr); self.set_zn(self.a)
+    def op_ora(self, addr): self.a |= self.read(addr); self.set_zn(self.a)
+    def op_eor(self, addr): self.a ^= self.read(addr); self.set_zn(self.a)
     
     def op_bit(self, addr):
-        val = self.nes.read(addr)
-        self.set_flag(0x80, val & 0x80)  # N
-        self.set_flag(0x40, val & 0x40)  # V
-        self.set_flag(0x02, (self.a & val) == 0)  # Z
+        val = self.read(addr)
+        # N and V from the operand, Z from A & operand
+        self.status = (self.status & 0x3D) | (val & 0xC0) | (0x02 if (self.a & val) == 0 else 0)
     
     # Arithmetic
     def op_adc(self, addr):
-        val = self.nes.read(addr)
-        carry = self.get_flag(0x01)
-        result = self.a + val + carry
-        
-        self.set_flag(0x01, result > 0xFF)  # C
-        self.set_flag(0x40, ((self.a ^ result) & (val ^ result) & 0x80))  # V
-        self.a = result & 0xFF
-        self.set_zn(self.a)
+        status = self.status
+        r = ADC_TABLE[((status & 0x01) << 16) | (self.a << 8) | self.read(addr)]
+        # C, V, Z and N come from the table in one masked update
+        self.status = (status & 0x3C) | (r >> 8)
+        self.a = r & 0xFF
     
     def op_sbc(self, addr):
-        val = self.nes.read(addr) ^ 0xFF
-        carry = self.get_flag(0x01)
-        result = self.a + val + carry
-        
-        self.set_flag(0x01, result > 0xFF)
-        self.set_flag(0x40, ((self.a ^ result) & (val ^ result) & 0x80))
-        self.a = result & 0xFF
-        self.set_zn(self.a)
+        status = self.status
+        r = ADC_TABLE[((status & 0x01) << 16) | (self.a << 8) | (self.read(addr) ^ 0xFF)]
+        self.status = (status & 0x3C) | (r >> 8)
+        self.a = r & 0xFF
     
     def op_cmp(self, addr):
-        val = self.nes.read(addr)
+        val = self.read(addr)
         result = (self.a - val) & 0x1FF
-        self.set_flag(0x01, self.a >= val)
+        self.status = (self.status & 0xFE) | (1 if self.a >= val else 0)
         self.set_zn(result & 0xFF)
     
     def op_cpx(self, addr):
-        val = self.nes.read(addr)
+        val = self.read(addr)
         result = (self.x - val) & 0x1FF
-        self.set_flag(0x01, self.x >= val)
+        self.status = (self.status & 0xFE) | (1 if self.x >= val else 0)
         self.set_zn(result & 0xFF)
     
     def op_cpy(self, addr):
-        val = self.nes.read(addr)
+        val = self.read(addr)
         result = (self.y - val) & 0x1FF
-        self.set_flag(0x01, self.y >= val)
+        self.status = (self.status & 0xFE) | (1 if self.y >= val else 0)
         self.set_zn(result & 0xFF)
     
     # Increment/Decrement
     def op_inc(self, addr): 
-        val = (self.nes.read(addr) + 1) & 0xFF
-        self.nes.write(addr, val)
+        val = (self.read(addr) + 1) & 0xFF
+        self.write(addr, val)
         self.set_zn(val)
     
     def op_dec(self, addr): 
-        val = (self.nes.read(addr) - 1) & 0xFF
-        self.nes.write(addr, val)
+        val = (self.read(addr) - 1) & 0xFF
+        self.write(addr, val)
         self.set_zn(val)
     
     def op_inx(self): self.x = (self.x + 1) & 0xFF; self.set_zn(self.x)
@@ -342,55 +424,57 @@ class CPU:
     def op_dey(self): self.y = (self.y - 1) & 0xFF; self.set_zn(self.y)
     
     # Shifts
-    def op_asl(self, addr):
-        if addr is None:  # ASL A
-            self.set_flag(0x01, self.a & 0x80)
-            self.a = (self.a << 1) & 0xFF
-            self.set_zn(self.a)
-        else:
-            val = self.nes.read(addr)
-            self.set_flag(0x01, val & 0x80)
-            val = (val << 1) & 0xFF
-            self.nes.write(addr, val)
-            self.set_zn(val)
+    def op_asl_a(self):
+        self.status = (self.status & 0xFE) | (self.a >> 7)
+        self.a = (self.a << 1) & 0xFF
+        self.set_zn(self.a)
     
-    def op_lsr(self, addr):
-        if addr is None:  # LSR A
-            self.set_flag(0x01, self.a & 0x01)
-            self.a >>= 1
-            self.set_zn(self.a)
-        else:
-            val = self.nes.read(addr)
-            self.set_flag(0x01, val & 0x01)
-            val >>= 1
-            self.nes.write(addr, val)
-            self.set_zn(val)
+    def op_asl_mem(self, addr):
+        val = self.read(addr)
+        self.status = (self.status & 0xFE) | (val >> 7)
+        val = (val << 1) & 0xFF
+        self.write(addr, val)
+        self.set_zn(val)
     
-    def op_rol(self, addr):
-        carry = self.get_flag(0x01)
-        if addr is None:  # ROL A
-            self.set_flag(0x01, self.a & 0x80)
-            self.a = ((self.a << 1) | carry) & 0xFF
-            self.set_zn(self.a)
-        else:
-            val = self.nes.read(addr)
-            self.set_flag(0x01, val & 0x80)
-            val = ((val << 1) | carry) & 0xFF
-            self.nes.write(addr, val)
-            self.set_zn(val)
+    def op_lsr_a(self):
+        self.status = (self.status & 0xFE) | (self.a & 0x01)
+        self.a >>= 1
+        self.set_zn(self.a)
     
-    def op_ror(self, addr):
-        carry = self.get_flag(0x01)
-        if addr is None:  # ROR A
-            self.set_flag(0x01, self.a & 0x01)
-            self.a = (self.a >> 1) | (carry << 7)
-            self.set_zn(self.a)
-        else:
-            val = self.nes.read(addr)
-            self.set_flag(0x01, val & 0x01)
-            val = (val >> 1) | (carry << 7)
-            self.nes.write(addr, val)
-            self.set_zn(val)
+    def op_lsr_mem(self, addr):
+        val = self.read(addr)
+        self.status = (self.status & 0xFE) | (val & 0x01)
+        val >>= 1
+        self.write(addr, val)
+        self.set_zn(val)
+    
+    def op_rol_a(self):
+        carry = self.status & 0x01
+        self.status = (self.status & 0xFE) | (self.a >> 7)
+        self.a = ((self.a << 1) | carry) & 0xFF
+        self.set_zn(self.a)
+    
+    def op_rol_mem(self, addr):
+        carry = self.status & 0x01
+        val = self.read(addr)
+        self.status = (self.status & 0xFE) | (val >> 7)
+        val = ((val << 1) | carry) & 0xFF
+        self.write(addr, val)
+        self.set_zn(val)
+    
+    def op_ror_a(self):
+        carry = self.status & 0x01
+        self.status = (self.status & 0xFE) | (self.a & 0x01)
+        self.a = (self.a >> 1) | (carry << 7)
+        self.set_zn(self.a)
+    
+    def op_ror_mem(self, addr):
+        carry = self.status & 0x01
+        val = self.read(addr)
+        self.status = (self.status & 0xFE) | (val & 0x01)
+        val = (val >> 1) | (carry << 7)
+        self.write(addr, val)
+        self.set_zn(val)
     
     # Jumps
     def op_jmp(self, addr): 
@@ -409,36 +493,31 @@ class CPU:
     
     # Branches
     def branch(self, condition):
+        """Relative branch; returns the extra cycles taken"""
         if condition:
-            offset = self.nes.read(self.pc)
-            self.pc += 1
-            if offset & 0x80: 
-                offset -= 256
-            old_pc = self.pc
-            self.pc = (self.pc + offset) & 0xFFFF
-            self.extra_cycles = 1
-            if (old_pc & 0xFF00) != (self.pc & 0xFF00):
-                self.extra_cycles = 2
-        else:
-            self.pc += 1
+            old_pc = self.pc + 1
+            self.pc = (old_pc + SBYTE[self.fetch8()]) & 0xFFFF
+            return 1 if (old_pc & 0xFF00) == (self.pc & 0xFF00) else 2
+        self.pc += 1
+        return 0
     
-    def op_bcc(self): self.branch(not self.get_flag(0x01))
-    def op_bcs(self): self.branch(self.get_flag(0x01))
-    def op_beq(self): self.branch(self.get_flag(0x02))
-    def op_bne(self): self.branch(not self.get_flag(0x02))
-    def op_bmi(self): self.branch(self.get_flag(0x80))
-    def op_bpl(self): self.branch(not self.get_flag(0x80))
-    def op_bvc(self): self.branch(not self.get_flag(0x40))
-    def op_bvs(self): self.branch(self.get_flag(0x40))
+    def op_bcc(self): return self.branch(not self.status & 0x01)
+    def op_bcs(self): return self.branch(self.status & 0x01)
+    def op_beq(self): return self.branch(self.status & 0x02)
+    def op_bne(self): return self.branch(not self.status & 0x02)
+    def op_bmi(self): return self.branch(self.status & 0x80)
+    def op_bpl(self): return self.branch(not self.status & 0x80)
+    def op_bvc(self): return self.branch(not self.status & 0x40)
+    def op_bvs(self): return self.branch(self.status & 0x40)
     
     # Flags
-    def op_clc(self): self.set_flag(0x01, 0)
-    def op_sec(self): self.set_flag(0x01, 1)
-    def op_cli(self): self.set_flag(0x04, 0)
-    def op_sei(self): self.set_flag(0x04, 1)
-    def op_clv(self): self.set_flag(0x40, 0)
-    def op_cld(self): self.set_flag(0x08, 0)
-    def op_sed(self): self.set_flag(0x08, 1)
+    def op_clc(self): self.status &= 0xFE
+    def op_sec(self): self.status |= 0x01
+    def op_cli(self): self.status &= 0xFB
+    def op_sei(self): self.status |= 0x04
+    def op_clv(self): self.status &= 0xBF
+    def op_cld(self): self.status &= 0xF7
+    def op_sed(self): self.status |= 0x08
     
     # Misc
     def op_nop(self): pass
@@ -446,247 +525,430 @@ class CPU:
         self.pc += 1
         self.push16(self.pc)
         self.push(self.status | 0x30)
-        self.set_flag(0x04, 1)
-        self.pc = self.nes.read16(0xFFFE)
+        self.status |= 0x04
+        self.pc = self.read16(0xFFFE)
 
     # ═══════════════════════════════════════════════════════
     # INSTRUCTION SET TABLE
     # ═══════════════════════════════════════════════════════
     def build_instruction_set(self):
-        """Complete 6502 instruction set mapping"""
+        """Complete 6502 instruction set mapping: (op method, addressing method or None)"""
         ops = self.op_table
         cyc = self.cycles_table
         
         # BRK/NOP/RTI/RTS
-        ops[0x00] = lambda: self.op_brk(); cyc[0x00] = 7
-        ops[0xEA] = lambda: self.op_nop(); cyc[0xEA] = 2
-        ops[0x40] = lambda: self.op_rti(); cyc[0x40] = 6
-        ops[0x60] = lambda: self.op_rts(); cyc[0x60] = 6
+        ops[0x00] = (self.op_brk, None); cyc[0x00] = 7
+        ops[0xEA] = (self.op_nop, None); cyc[0xEA] = 2
+        ops[0x40] = (self.op_rti, None); cyc[0x40] = 6
+        ops[0x60] = (self.op_rts, None); cyc[0x60] = 6
         
         # LDA
-        ops[0xA9] = lambda: self.op_lda(self.addr_imm()); cyc[0xA9] = 2
-        ops[0xA5] = lambda: self.op_lda(self.addr_zp()); cyc[0xA5] = 3
-        ops[0xB5] = lambda: self.op_lda(self.addr_zpx()); cyc[0xB5] = 4
-        ops[0xAD] = lambda: self.op_lda(self.addr_abs()); cyc[0xAD] = 4
-        ops[0xBD] = lambda: self.op_lda(self.addr_absx()); cyc[0xBD] = 4
-        ops[0xB9] = lambda: self.op_lda(self.addr_absy()); cyc[0xB9] = 4
-        ops[0xA1] = lambda: self.op_lda(self.addr_indx()); cyc[0xA1] = 6
-        ops[0xB1] = lambda: self.op_lda(self.addr_indy()); cyc[0xB1] = 5
+        ops[0xA9] = (self.op_lda, self.addr_imm); cyc[0xA9] = 2
+        ops[0xA5] = (self.op_lda, self.addr_zp); cyc[0xA5] = 3
+        ops[0xB5] = (self.op_lda, self.addr_zpx); cyc[0xB5] = 4
+        ops[0xAD] = (self.op_lda, self.addr_abs); cyc[0xAD] = 4
+        ops[0xBD] = (self.op_lda, self.addr_absx); cyc[0xBD] = 4
+        ops[0xB9] = (self.op_lda, self.addr_absy); cyc[0xB9] = 4
+        ops[0xA1] = (self.op_lda, self.addr_indx); cyc[0xA1] = 6
+        ops[0xB1] = (self.op_lda, self.addr_indy); cyc[0xB1] = 5
         
         # LDX
-        ops[0xA2] = lambda: self.op_ldx(self.addr_imm()); cyc[0xA2] = 2
-        ops[0xA6] = lambda: self.op_ldx(self.addr_zp()); cyc[0xA6] = 3
-        ops[0xB6] = lambda: self.op_ldx(self.addr_zpy()); cyc[0xB6] = 4
-        ops[0xAE] = lambda: self.op_ldx(self.addr_abs()); cyc[0xAE] = 4
-        ops[0xBE] = lambda: self.op_ldx(self.addr_absy()); cyc[0xBE] = 4
+        ops[0xA2] = (self.op_ldx, self.addr_imm); cyc[0xA2] = 2
+        ops[0xA6] = (self.op_ldx, self.addr_zp); cyc[0xA6] = 3
+        ops[0xB6] = (self.op_ldx, self.addr_zpy); cyc[0xB6] = 4
+        ops[0xAE] = (self.op_ldx, self.addr_abs); cyc[0xAE] = 4
+        ops[0xBE] = (self.op_ldx, self.addr_absy); cyc[0xBE] = 4
         
         # LDY
-        ops[0xA0] = lambda: self.op_ldy(self.addr_imm()); cyc[0xA0] = 2
-        ops[0xA4] = lambda: self.op_ldy(self.addr_zp()); cyc[0xA4] = 3
-        ops[0xB4] = lambda: self.op_ldy(self.addr_zpx()); cyc[0xB4] = 4
-        ops[0xAC] = lambda: self.op_ldy(self.addr_abs()); cyc[0xAC] = 4
-        ops[0xBC] = lambda: self.op_ldy(self.addr_absx()); cyc[0xBC] = 4
+        ops[0xA0] = (self.op_ldy, self.addr_imm); cyc[0xA0] = 2
+        ops[0xA4] = (self.op_ldy, self.addr_zp); cyc[0xA4] = 3
+        ops[0xB4] = (self.op_ldy, self.addr_zpx); cyc[0xB4] = 4
+        ops[0xAC] = (self.op_ldy, self.addr_abs); cyc[0xAC] = 4
+        ops[0xBC] = (self.op_ldy, self.addr_absx); cyc[0xBC] = 4
         
         # STA
-        ops[0x85] = lambda: self.op_sta(self.addr_zp()); cyc[0x85] = 3
-        ops[0x95] = lambda: self.op_sta(self.addr_zpx()); cyc[0x95] = 4
-        ops[0x8D] = lambda: self.op_sta(self.addr_abs()); cyc[0x8D] = 4
-        ops[0x9D] = lambda: self.op_sta(self.addr_absx()); cyc[0x9D] = 5
-        ops[0x99] = lambda: self.op_sta(self.addr_absy()); cyc[0x99] = 5
-        ops[0x81] = lambda: self.op_sta(self.addr_indx()); cyc[0x81] = 6
-        ops[0x91] = lambda: self.op_sta(self.addr_indy()); cyc[0x91] = 6
+        ops[0x85] = (self.op_sta, self.addr_zp); cyc[0x85] = 3
+        ops[0x95] = (self.op_sta, self.addr_zpx); cyc[0x95] = 4
+        ops[0x8D] = (self.op_sta, self.addr_abs); cyc[0x8D] = 4
+        ops[0x9D] = (self.op_sta, self.addr_absx); cyc[0x9D] = 5
+        ops[0x99] = (self.op_sta, self.addr_absy); cyc[0x99] = 5
+        ops[0x81] = (self.op_sta, self.addr_indx); cyc[0x81] = 6
+        ops[0x91] = (self.op_sta, self.addr_indy); cyc[0x91] = 6
         
         # STX/STY
-        ops[0x86] = lambda: self.op_stx(self.addr_zp()); cyc[0x86] = 3
-        ops[0x96] = lambda: self.op_stx(self.addr_zpy()); cyc[0x96] = 4
-        ops[0x8E] = lambda: self.op_stx(self.addr_abs()); cyc[0x8E] = 4
-        ops[0x84] = lambda: self.op_sty(self.addr_zp()); cyc[0x84] = 3
-        ops[0x94] = lambda: self.op_sty(self.addr_zpx()); cyc[0x94] = 4
-        ops[0x8C] = lambda: self.op_sty(self.addr_abs()); cyc[0x8C] = 4
+        ops[0x86] = (self.op_stx, self.addr_zp); cyc[0x86] = 3
+        ops[0x96] = (self.op_stx, self.addr_zpy); cyc[0x96] = 4
+        ops[0x8E] = (self.op_stx, self.addr_abs); cyc[0x8E] = 4
+        ops[0x84] = (self.op_sty, self.addr_zp); cyc[0x84] = 3
+        ops[0x94] = (self.op_sty, self.addr_zpx); cyc[0x94] = 4
+        ops[0x8C] = (self.op_sty, self.addr_abs); cyc[0x8C] = 4
         
         # Transfer
-        ops[0xAA] = lambda: self.op_tax(); cyc[0xAA] = 2
-        ops[0xA8] = lambda: self.op_tay(); cyc[0xA8] = 2
-        ops[0x8A] = lambda: self.op_txa(); cyc[0x8A] = 2
-        ops[0x98] = lambda: self.op_tya(); cyc[0x98] = 2
-        ops[0xBA] = lambda: self.op_tsx(); cyc[0xBA] = 2
-        ops[0x9A] = lambda: self.op_txs(); cyc[0x9A] = 2
+        ops[0xAA] = (self.op_tax, None); cyc[0xAA] = 2
+        ops[0xA8] = (self.op_tay, None); cyc[0xA8] = 2
+        ops[0x8A] = (self.op_txa, None); cyc[0x8A] = 2
+        ops[0x98] = (self.op_tya, None); cyc[0x98] = 2
+        ops[0xBA] = (self.op_tsx, None); cyc[0xBA] = 2
+        ops[0x9A] = (self.op_txs, None); cyc[0x9A] = 2
         
         # Stack
-        ops[0x48] = lambda: self.op_pha(); cyc[0x48] = 3
-        ops[0x08] = lambda: self.op_php(); cyc[0x08] = 3
-        ops[0x68] = lambda: self.op_pla(); cyc[0x68] = 4
-        ops[0x28] = lambda: self.op_plp(); cyc[0x28] = 4
+        ops[0x48] = (self.op_pha, None); cyc[0x48] = 3
+        ops[0x08] = (self.op_php, None); cyc[0x08] = 3
+        ops[0x68] = (self.op_pla, None); cyc[0x68] = 4
+        ops[0x28] = (self.op_plp, None); cyc[0x28] = 4
         
         # AND
-        ops[0x29] = lambda: self.op_and(self.addr_imm()); cyc[0x29] = 2
-        ops[0x25] = lambda: self.op_and(self.addr_zp()); cyc[0x25] = 3
-        ops[0x35] = lambda: self.op_and(self.addr_zpx()); cyc[0x35] = 4
-        ops[0x2D] = lambda: self.op_and(self.addr_abs()); cyc[0x2D] = 4
-        ops[0x3D] = lambda: self.op_and(self.addr_absx()); cyc[0x3D] = 4
-        ops[0x39] = lambda: self.op_and(self.addr_absy()); cyc[0x39] = 4
-        ops[0x21] = lambda: self.op_and(self.addr_indx()); cyc[0x21] = 6
-        ops[0x31] = lambda: self.op_and(self.addr_indy()); cyc[0x31] = 5
+        ops[0x29] = (self.op_and, self.addr_imm); cyc[0x29] = 2
+        ops[0x25] = (self.op_and, self.addr_zp); cyc[0x25] = 3
+        ops[0x35] = (self.op_and, self.addr_zpx); cyc[0x35] = 4
+        ops[0x2D] = (self.op_and, self.addr_abs); cyc[0x2D] = 4
+        ops[0x3D] = (self.op_and, self.addr_absx); cyc[0x3D] = 4
+        ops[0x39] = (self.op_and, self.addr_absy); cyc[0x39] = 4
+        ops[0x21] = (self.op_and, self.addr_indx); cyc[0x21] = 6
+        ops[0x31] = (self.op_and, self.addr_indy); cyc[0x31] = 5
         
         # ORA
-        ops[0x09] = lambda: self.op_ora(self.addr_imm()); cyc[0x09] = 2
-        ops[0x05] = lambda: self.op_ora(self.addr_zp()); cyc[0x05] = 3
-        ops[0x15] = lambda: self.op_ora(self.addr_zpx()); cyc[0x15] = 4
-        ops[0x0D] = lambda: self.op_ora(self.addr_abs()); cyc[0x0D] = 4
-        ops[0x1D] = lambda: self.op_ora(self.addr_absx()); cyc[0x1D] = 4
-        ops[0x19] = lambda: self.op_ora(self.addr_absy()); cyc[0x19] = 4
-        ops[0x01] = lambda: self.op_ora(self.addr_indx()); cyc[0x01] = 6
-        ops[0x11] = lambda: self.op_ora(self.addr_indy()); cyc[0x11] = 5
+        ops[0x09] = (self.op_ora, self.addr_imm); cyc[0x09] = 2
+        ops[0x05] = (self.op_ora, self.addr_zp); cyc[0x05] = 3
+        ops[0x15] = (self.op_ora, self.addr_zpx); cyc[0x15] = 4
+        ops[0x0D] = (self.op_ora, self.addr_abs); cyc[0x0D] = 4
+        ops[0x1D] = (self.op_ora, self.addr_absx); cyc[0x1D] = 4
+        ops[0x19] = (self.op_ora, self.addr_absy); cyc[0x19] = 4
+        ops[0x01] = (self.op_ora, self.addr_indx); cyc[0x01] = 6
+        ops[0x11] = (self.op_ora, self.addr_indy); cyc[0x11] = 5
         
         # EOR
-        ops[0x49] = lambda: self.op_eor(self.addr_imm()); cyc[0x49] = 2
-        ops[0x45] = lambda: self.op_eor(self.addr_zp()); cyc[0x45] = 3
-        ops[0x55] = lambda: self.op_eor(self.addr_zpx()); cyc[0x55] = 4
-        ops[0x4D] = lambda: self.op_eor(self.addr_abs()); cyc[0x4D] = 4
-        ops[0x5D] = lambda: self.op_eor(self.addr_absx()); cyc[0x5D] = 4
-        ops[0x59] = lambda: self.op_eor(self.addr_absy()); cyc[0x59] = 4
-        ops[0x41] = lambda: self.op_eor(self.addr_indx()); cyc[0x41] = 6
-        ops[0x51] = lambda: self.op_eor(self.addr_indy()); cyc[0x51] = 5
+        ops[0x49] = (self.op_eor, self.addr_imm); cyc[0x49] = 2
+        ops[0x45] = (self.op_eor, self.addr_zp); cyc[0x45] = 3
+        ops[0x55] = (self.op_eor, self.addr_zpx); cyc[0x55] = 4
+        ops[0x4D] = (self.op_eor, self.addr_abs); cyc[0x4D] = 4
+        ops[0x5D] = (self.op_eor, self.addr_absx); cyc[0x5D] = 4
+        ops[0x59] = (self.op_eor, self.addr_absy); cyc[0x59] = 4
+        ops[0x41] = (self.op_eor, self.addr_indx); cyc[0x41] = 6
+        ops[0x51] = (self.op_eor, self.addr_indy); cyc[0x51] = 5
         
         # ADC
-        ops[0x69] = lambda: self.op_adc(self.addr_imm()); cyc[0x69] = 2
-        ops[0x65] = lambda: self.op_adc(self.addr_zp()); cyc[0x65] = 3
-        ops[0x75] = lambda: self.op_adc(self.addr_zpx()); cyc[0x75] = 4
-        ops[0x6D] = lambda: self.op_adc(self.addr_abs()); cyc[0x6D] = 4
-        ops[0x7D] = lambda: self.op_adc(self.addr_absx()); cyc[0x7D] = 4
-        ops[0x79] = lambda: self.op_adc(self.addr_absy()); cyc[0x79] = 4
-        ops[0x61] = lambda: self.op_adc(self.addr_indx()); cyc[0x61] = 6
-        ops[0x71] = lambda: self.op_adc(self.addr_indy()); cyc[0x71] = 5
+        ops[0x69] = (self.op_adc, self.addr_imm); cyc[0x69] = 2
+        ops[0x65] = (self.op_adc, self.addr_zp); cyc[0x65] = 3
+        ops[0x75] = (self.op_adc, self.addr_zpx); cyc[0x75] = 4
+        ops[0x6D] = (self.op_adc, self.addr_abs); cyc[0x6D] = 4
+        ops[0x7D] = (self.op_adc, self.addr_absx); cyc[0x7D] = 4
+        ops[0x79] = (self.op_adc, self.addr_absy); cyc[0x79] = 4
+        ops[0x61] = (self.op_adc, self.addr_indx); cyc[0x61] = 6
+        ops[0x71] = (self.op_adc, self.addr_indy); cyc[0x71] = 5
         
         # SBC
-        ops[0xE9] = lambda: self.op_sbc(self.addr_imm()); cyc[0xE9] = 2
-        ops[0xE5] = lambda: self.op_sbc(self.addr_zp()); cyc[0xE5] = 3
-        ops[0xF5] = lambda: self.op_sbc(self.addr_zpx()); cyc[0xF5] = 4
-        ops[0xED] = lambda: self.op_sbc(self.addr_abs()); cyc[0xED] = 4
-        ops[0xFD] = lambda: self.op_sbc(self.addr_absx()); cyc[0xFD] = 4
-        ops[0xF9] = lambda: self.op_sbc(self.addr_absy()); cyc[0xF9] = 4
-        ops[0xE1] = lambda: self.op_sbc(self.addr_indx()); cyc[0xE1] = 6
-        ops[0xF1] = lambda: self.op_sbc(self.addr_indy()); cyc[0xF1] = 5
+        ops[0xE9] = (self.op_sbc, self.addr_imm); cyc[0xE9] = 2
+        ops[0xE5] = (self.op_sbc, self.addr_zp); cyc[0xE5] = 3
+        ops[0xF5] = (self.op_sbc, self.addr_zpx); cyc[0xF5] = 4
+        ops[0xED] = (self.op_sbc, self.addr_abs); cyc[0xED] = 4
+        ops[0xFD] = (self.op_sbc, self.addr_absx); cyc[0xFD] = 4
+        ops[0xF9] = (self.op_sbc, self.addr_absy); cyc[0xF9] = 4
+        ops[0xE1] = (self.op_sbc, self.addr_indx); cyc[0xE1] = 6
+        ops[0xF1] = (self.op_sbc, self.addr_indy); cyc[0xF1] = 5
         
         # CMP
-        ops[0xC9] = lambda: self.op_cmp(self.addr_imm()); cyc[0xC9] = 2
-        ops[0xC5] = lambda: self.op_cmp(self.addr_zp()); cyc[0xC5] = 3
-        ops[0xD5] = lambda: self.op_cmp(self.addr_zpx()); cyc[0xD5] = 4
-        ops[0xCD] = lambda: self.op_cmp(self.addr_abs()); cyc[0xCD] = 4
-        ops[0xDD] = lambda: self.op_cmp(self.addr_absx()); cyc[0xDD] = 4
-        ops[0xD9] = lambda: self.op_cmp(self.addr_absy()); cyc[0xD9] = 4
-        ops[0xC1] = lambda: self.op_cmp(self.addr_indx()); cyc[0xC1] = 6
-        ops[0xD1] = lambda: self.op_cmp(self.addr_indy()); cyc[0xD1] = 5
+        ops[0xC9] = (self.op_cmp, self.addr_imm); cyc[0xC9] = 2
+        ops[0xC5] = (self.op_cmp, self.addr_zp); cyc[0xC5] = 3
+        ops[0xD5] = (self.op_cmp, self.addr_zpx); cyc[0xD5] = 4
+        ops[0xCD] = (self.op_cmp, self.addr_abs); cyc[0xCD] = 4
+        ops[0xDD] = (self.op_cmp, self.addr_absx); cyc[0xDD] = 4
+        ops[0xD9] = (self.op_cmp, self.addr_absy); cyc[0xD9] = 4
+        ops[0xC1] = (self.op_cmp, self.addr_indx); cyc[0xC1] = 6
+        ops[0xD1] = (self.op_cmp, self.addr_indy); cyc[0xD1] = 5
         
         # CPX/CPY
-        ops[0xE0] = lambda: self.op_cpx(self.addr_imm()); cyc[0xE0] = 2
-        ops[0xE4] = lambda: self.op_cpx(self.addr_zp()); cyc[0xE4] = 3
-        ops[0xEC] = lambda: self.op_cpx(self.addr_abs()); cyc[0xEC] = 4
-        ops[0xC0] = lambda: self.op_cpy(self.addr_imm()); cyc[0xC0] = 2
-        ops[0xC4] = lambda: self.op_cpy(self.addr_zp()); cyc[0xC4] = 3
-        ops[0xCC] = lambda: self.op_cpy(self.addr_abs()); cyc[0xCC] = 4
+        ops[0xE0] = (self.op_cpx, self.addr_imm); cyc[0xE0] = 2
+        ops[0xE4] = (self.op_cpx, self.addr_zp); cyc[0xE4] = 3
+        ops[0xEC] = (self.op_cpx, self.addr_abs); cyc[0xEC] = 4
+        ops[0xC0] = (self.op_cpy, self.addr_imm); cyc[0xC0] = 2
+        ops[0xC4] = (self.op_cpy, self.addr_zp); cyc[0xC4] = 3
+        ops[0xCC] = (self.op_cpy, self.addr_abs); cyc[0xCC] = 4
         
         # INC/DEC
-        ops[0xE6] = lambda: self.op_inc(self.addr_zp()); cyc[0xE6] = 5
-        ops[0xF6] = lambda: self.op_inc(self.addr_zpx()); cyc[0xF6] = 6
-        ops[0xEE] = lambda: self.op_inc(self.addr_abs()); cyc[0xEE] = 6
-        ops[0xFE] = lambda: self.op_inc(self.addr_absx()); cyc[0xFE] = 7
-        ops[0xC6] = lambda: self.op_dec(self.addr_zp()); cyc[0xC6] = 5
-        ops[0xD6] = lambda: self.op_dec(self.addr_zpx()); cyc[0xD6] = 6
-        ops[0xCE] = lambda: self.op_dec(self.addr_abs()); cyc[0xCE] = 6
-        ops[0xDE] = lambda: self.op_dec(self.addr_absx()); cyc[0xDE] = 7
-        ops[0xE8] = lambda: self.op_inx(); cyc[0xE8] = 2
-        ops[0xCA] = lambda: self.op_dex(); cyc[0xCA] = 2
-        ops[0xC8] = lambda: self.op_iny(); cyc[0xC8] = 2
-        ops[0x88] = lambda: self.op_dey(); cyc[0x88] = 2
+        ops[0xE6] = (self.op_inc, self.addr_zp); cyc[0xE6] = 5
+        ops[0xF6] = (self.op_inc, self.addr_zpx); cyc[0xF6] = 6
+        ops[0xEE] = (self.op_inc, self.addr_abs); cyc[0xEE] = 6
+        ops[0xFE] = (self.op_inc, self.addr_absx); cyc[0xFE] = 7
+        ops[0xC6] = (self.op_dec, self.addr_zp); cyc[0xC6] = 5
+        ops[0xD6] = (self.op_dec, self.addr_zpx); cyc[0xD6] = 6
+        ops[0xCE] = (self.op_dec, self.addr_abs); cyc[0xCE] = 6
+        ops[0xDE] = (self.op_dec, self.addr_absx); cyc[0xDE] = 7
+        ops[0xE8] = (self.op_inx, None); cyc[0xE8] = 2
+        ops[0xCA] = (self.op_dex, None); cyc[0xCA] = 2
+        ops[0xC8] = (self.op_iny, None); cyc[0xC8] = 2
+        ops[0x88] = (self.op_dey, None); cyc[0x88] = 2
         
         # Shifts
-        ops[0x0A] = lambda: self.op_asl(None); cyc[0x0A] = 2
-        ops[0x06] = lambda: self.op_asl(self.addr_zp()); cyc[0x06] = 5
-        ops[0x16] = lambda: self.op_asl(self.addr_zpx()); cyc[0x16] = 6
-        ops[0x0E] = lambda: self.op_asl(self.addr_abs()); cyc[0x0E] = 6
-        ops[0x1E] = lambda: self.op_asl(self.addr_absx()); cyc[0x1E] = 7
-        
-        ops[0x4A] = lambda: self.op_lsr(None); cyc[0x4A] = 2
-        ops[0x46] = lambda: self.op_lsr(self.addr_zp()); cyc[0x46] = 5
-        ops[0x56] = lambda: self.op_lsr(self.addr_zpx()); cyc[0x56] = 6
-        ops[0x4E] = lambda: self.op_lsr(self.addr_abs()); cyc[0x4E] = 6
-        ops[0x5E] = lambda: self.op_lsr(self.addr_absx()); cyc[0x5E] = 7
-        
-        ops[0x2A] = lambda: self.op_rol(None); cyc[0x2A] = 2
-        ops[0x26] = lambda: self.op_rol(self.addr_zp()); cyc[0x26] = 5
-        ops[0x36] = lambda: self.op_rol(self.addr_zpx()); cyc[0x36] = 6
-        ops[0x2E] = lambda: self.op_rol(self.addr_abs()); cyc[0x2E] = 6
-        ops[0x3E] = lambda: self.op_rol(self.addr_absx()); cyc[0x3E] = 7
-        
-        ops[0x6A] = lambda: self.op_ror(None); cyc[0x6A] = 2
-        ops[0x66] = lambda: self.op_ror(self.addr_zp()); cyc[0x66] = 5
-        ops[0x76] = lambda: self.op_ror(self.addr_zpx()); cyc[0x76] = 6
-        ops[0x6E] = lambda: self.op_ror(self.addr_abs()); cyc[0x6E] = 6
-        ops[0x7E] = lambda: self.op_ror(self.addr_absx()); cyc[0x7E] = 7
+        ops[0x0A] = (self.op_asl_a, None); cyc[0x0A] = 2
+        ops[0x06] = (self.op_asl_mem, self.addr_zp); cyc[0x06] = 5
+        ops[0x16] = (self.op_asl_mem, self.addr_zpx); cyc[0x16] = 6
+        ops[0x0E] = (self.op_asl_mem, self.addr_abs); cyc[0x0E] = 6
+        ops[0x1E] = (self.op_asl_mem, self.addr_absx); cyc[0x1E] = 7
+        
+        ops[0x4A] = (self.op_lsr_a, None); cyc[0x4A] = 2
+        ops[0x46] = (self.op_lsr_mem, self.addr_zp); cyc[0x46] = 5
+        ops[0x56] = (self.op_lsr_mem, self.addr_zpx); cyc[0x56] = 6
+        ops[0x4E] = (self.op_lsr_mem, self.addr_abs); cyc[0x4E] = 6
+        ops[0x5E] = (self.op_lsr_mem, self.addr_absx); cyc[0x5E] = 7
+        
+        ops[0x2A] = (self.op_rol_a, None); cyc[0x2A] = 2
+        ops[0x26] = (self.op_rol_mem, self.addr_zp); cyc[0x26] = 5
+        ops[0x36] = (self.op_rol_mem, self.addr_zpx); cyc[0x36] = 6
+        ops[0x2E] = (self.op_rol_mem, self.addr_abs); cyc[0x2E] = 6
+        ops[0x3E] = (self.op_rol_mem, self.addr_absx); cyc[0x3E] = 7
+        
+        ops[0x6A] = (self.op_ror_a, None); cyc[0x6A] = 2
+        ops[0x66] = (self.op_ror_mem, self.addr_zp); cyc[0x66] = 5
+        ops[0x76] = (self.op_ror_mem, self.addr_zpx); cyc[0x76] = 6
+        ops[0x6E] = (self.op_ror_mem, self.addr_abs); cyc[0x6E] = 6
+        ops[0x7E] = (self.op_ror_mem, self.addr_absx); cyc[0x7E] = 7
         
         # Jumps
-        ops[0x4C] = lambda: self.op_jmp(self.addr_abs()); cyc[0x4C] = 3
-        ops[0x6C] = lambda: self.op_jmp(self.addr_ind()); cyc[0x6C] = 5
-        ops[0x20] = lambda: self.op_jsr(self.addr_abs()); cyc[0x20] = 6
+        ops[0x4C] = (self.op_jmp, self.addr_abs); cyc[0x4C] = 3
+        ops[0x6C] = (self.op_jmp, self.addr_ind); cyc[0x6C] = 5
+        ops[0x20] = (self.op_jsr, self.addr_abs); cyc[0x20] = 6
         
         # Branches
-        ops[0x90] = lambda: self.op_bcc(); cyc[0x90] = 2
-        ops[0xB0] = lambda: self.op_bcs(); cyc[0xB0] = 2
-        ops[0xF0] = lambda: self.op_beq(); cyc[0xF0] = 2
-        ops[0xD0] = lambda: self.op_bne(); cyc[0xD0] = 2
-        ops[0x30] = lambda: self.op_bmi(); cyc[0x30] = 2
-        ops[0x10] = lambda: self.op_bpl(); cyc[0x10] = 2
-        ops[0x50] = lambda: self.op_bvc(); cyc[0x50] = 2
-        ops[0x70] = lambda: self.op_bvs(); cyc[0x70] = 2
+        ops[0x90] = (self.op_bcc, None); cyc[0x90] = 2
+        ops[0xB0] = (self.op_bcs, None); cyc[0xB0] = 2
+        ops[0xF0] = (self.op_beq, None); cyc[0xF0] = 2
+        ops[0xD0] = (self.op_bne, None); cyc[0xD0] = 2
+        ops[0x30] = (self.op_bmi, None); cyc[0x30] = 2
+        ops[0x10] = (self.op_bpl, None); cyc[0x10] = 2
+        ops[0x50] = (self.op_bvc, None); cyc[0x50] = 2
+        ops[0x70] = (self.op_bvs, None); cyc[0x70] = 2
         
         # Flags
-        ops[0x18] = lambda: self.op_clc(); cyc[0x18] = 2
-        ops[0x38] = lambda: self.op_sec(); cyc[0x38] = 2
-        ops[0x58] = lambda: self.op_cli(); cyc[0x58] = 2
-        ops[0x78] = lambda: self.op_sei(); cyc[0x78] = 2
-        ops[0xB8] = lambda: self.op_clv(); cyc[0xB8] = 2
-        ops[0xD8] = lambda: self.op_cld(); cyc[0xD8] = 2
-        ops[0xF8] = lambda: self.op_sed(); cyc[0xF8] = 2
+        ops[0x18] = (self.op_clc, None); cyc[0x18] = 2
+        ops[0x38] = (self.op_sec, None); cyc[0x38] = 2
+        ops[0x58] = (self.op_cli, None); cyc[0x58] = 2
+        ops[0x78] = (self.op_sei, None); cyc[0x78] = 2
+        ops[0xB8] = (self.op_clv, None); cyc[0xB8] = 2
+        ops[0xD8] = (self.op_cld, None); cyc[0xD8] = 2
+        ops[0xF8] = (self.op_sed, None); cyc[0xF8] = 2
         
         # BIT
-        ops[0x24] = lambda: self.op_bit(self.addr_zp()); cyc[0x24] = 3
-        ops[0x2C] = lambda: self.op_bit(self.addr_abs()); cyc[0x2C] = 4
+        ops[0x24] = (self.op_bit, self.addr_zp); cyc[0x24] = 3
+        ops[0x2C] = (self.op_bit, self.addr_abs); cyc[0x2C] = 4
 
     def step(self):
         """Execute one instruction"""
-        if sys_bus.console_active or sys_bus.paused:
-            return 2
-        
         # Handle interrupts
-        if self.nmi_pending:
-            self.nmi()
-            self.nmi_pending = False
-            return 7
-        
-        if self.irq_pending and not self.get_flag(0x04):
-            self.irq()
-            self.irq_pending = False
-            return 7
+        pending = self.pending
+        if pending:
+            if pending & PENDING_NMI:
+                self.nmi()
+                self.pending &= ~PENDING_NMI
+                return 7
+            
+            if not self.status & 0x04:
+                self.irq()
+                self.pending &= ~PENDING_IRQ
+                return 7
         
         # Fetch opcode
-        opcode = self.nes.read(self.pc)
-        self.pc = (self.pc + 1) & 0xFFFF
-        
-        # Reset extra cycles
-        self.extra_cycles = 0
+        opcode = self.fetch8()
+        self.pc &= 0xFFFF
         
         # Execute
-        if self.op_table[opcode]:
-            self.op_table[opcode]()
-            cycles = self.cycles_table[opcode] + self.extra_cycles
-        else:
-            # Illegal opcode - treat as NOP
-            cycles = 2
-        
+        cycles = self.handlers[opcode]()
         self.total_cycles += cycles
         return cycles
 
+    def run(self, budget):
+        """Execute whole instructions until at least budget cycles have run
+
+        The fetch/decode/execute loop of step(), kept in one frame with the
+        tables in locals. Pending interrupts go through step() itself.
+        Returns the cycles actually used.
+        
+        Hot PRG addresses run as compiled blocks (see compile_block) when
+        the whole block fits in what is left of the budget.
+        """
+        read = self.read
+        prg = self._prg
+        handlers = self.handlers
+        blocks = self.blocks
+        hits = self.block_hits
+        done = 0
+        while done < budget:
+            if self.pending:
+                done += self.step()
+                continue
+            
+            pc = self.pc
+            block = blocks.get(pc)
+            if block:
+                code, reach = block
+                if done + reach < budget:
+                    cycles = code()
+                    self.total_cycles += cycles
+                    done += cycles
+                    continue
+            elif block is None and 0x8000 <= pc <= 0xFFFF:
+                count = hits.get(pc, 0) + 1
+                hits[pc] = count
+                if count >= BLOCK_HOT:
+                    blocks[pc] = self.compile_block(pc)
+                    continue
+            
+            opcode = prg[pc - 0x8000] if 0x8000 <= pc <= 0xFFFF else read(pc)
+            self.pc = (pc + 1) & 0xFFFF
+            cycles = handlers[opcode]()
+            self.total_cycles += cycles
+            done += cycles
+        return done
+
+    def build_handlers(self):
+        """One function per opcode that runs the whole instruction
+        
+        Each handler calls its addressing mode and op directly and returns
+        the cycles taken, so dispatch is a single call with no table unpack
+        or mode test. Branches and the page-crossing indexed modes hand
+        their extra cycles back as return values.
+        """
+        lines = []
+        for opcode, (op, addr, cycles) in enumerate(self.dispatch):
+            name = op.__name__
+            mode = addr.__name__ if addr else None
+            lines.append(f"def handler_{opcode:02X}():")
+            if name in BRANCH_TAKEN:
+                lines.append(f"    return {cycles} + {name}()")
+            elif mode in ('addr_absx', 'addr_absy', 'addr_indy'):
+                lines.append(f"    addr, extra = {mode}()")
+                lines.append(f"    {name}(addr)")
+                lines.append(f"    return {cycles} + extra")
+            else:
+                lines.append(f"    {name}({mode}())" if addr else f"    {name}()")
+                lines.append(f"    return {cycles}")
+        ns = self.block_globals
+        exec(compile("\n".join(lines), "<cpu-handlers>", "exec"), ns)
+        return tuple(ns.pop(f"handler_{opcode:02X}") for opcode in range(256))
+
+    def compile_block(self, start):
+        """Translate the PRG code at start into one straight-line function
+        
+        Runs up to the first instruction that reads or redirects PC, or
+        BLOCK_MAX instructions. Operands are read from PRG now and pasted
+        in as literals, so most addressing modes disappear; conditional
+        branches are resolved in place, and a few common pairs are fused
+        (see STEP_REG, COMPARE_REG, LOAD_REG). Returns (function, reach),
+        where reach is the most cycles the instructions before the last can
+        take: the block only runs when each of its instructions would have
+        started within the budget. Returns False if nothing at start can be
+        compiled.
+        """
+        prg = self._prg
+        lines = []
+        pc = start
+        count = base = reach = last = 0
+        uses_extra = ends = False
+        branch = prev = None
+        for count in range(BLOCK_MAX):
+            op, addr, cycles = self.dispatch[prg[pc - 0x8000]]
+            mode = addr.__name__ if addr else None
+            name = op.__name__
+            size = 2 if name in BRANCH_TAKEN else 1 + OPERAND_SIZE[mode]
+            if pc + size > 0x10000:
+                break
+            lo = prg[pc - 0x7FFF] if size > 1 else 0
+            word = (prg[pc - 0x7FFE] << 8) | lo if size > 2 else lo
+            reach += last
+            base += cycles
+            last = cycles
+            
+            if name in BRANCH_TAKEN:
+                fallthrough = ((pc + 1) & 0xFFFF) + 1
+                target = (fallthrough + SBYTE[lo]) & 0xFFFF
+                penalty = 1 if (fallthrough & 0xFF00) == (target & 0xFF00) else 2
+                cond = BRANCH_TAKEN[name]
+                if prev and name in ('op_bne', 'op_beq'):
+                    prev_name, prev_mode, prev_lo, at = prev
+                    if prev_name in STEP_REG:
+                        reg, sign = STEP_REG[prev_name]
+                        lines[at:] = [f"r = (self.{reg} {sign} 1) & 0xFF",
+                                      f"self.{reg} = r",
+                                      "self.status = (self.status & 0x7D) | (0x02 if r == 0 else 0) | (r & 0x80)"]
+                        cond = "r" if name == 'op_bne' else "not r"
+                    elif prev_name in COMPARE_REG and prev_mode == 'addr_imm':
+                        lines[at:] = [f"r = self.{COMPARE_REG[prev_name]}",
+                                      f"self.status = ((self.status & 0x7C) | (0x01 if r >= 0x{prev_lo:02X} else 0)"
+                                      f" | (0x02 if r == 0x{prev_lo:02X} else 0) | ((r - 0x{prev_lo:02X}) & 0x80))"]
+                        cond = f"r {'!=' if name == 'op_bne' else '=='} 0x{prev_lo:02X}"
+                branch = (cond, target, penalty)
+                pc = fallthrough
+                last += 2
+                break
+            
+            if name in BLOCK_END:
+                lines.append(f"self.pc = 0x{(pc + 1) & 0xFFFF:04X}")
+                lines.append(f"{name}({mode}())" if addr else f"{name}()")
+                ends = True
+                break
+            
+            if (prev and name in STORE_REG and mode in ('addr_zp', 'addr_abs') and word < 0x2000
+                    and prev[0] in LOAD_REG and prev[1] == 'addr_imm'
+                    and LOAD_REG[prev[0]] == STORE_REG[name]):
+                value, at = prev[2], prev[3]
+                flags = (0x02 if value == 0 else 0) | (value & 0x80)
+                lines[at:] = [f"self.{STORE_REG[name]} = 0x{value:02X}",
+                              f"self.status = (self.status & 0x7D) | 0x{flags:02X}",
+                              f"ram[0x{word & 0x7FF:03X}] = 0x{value:02X}"]
+                prev = None
+                pc = ((pc + 1) & 0xFFFF) + size - 1
+                continue
+            
+            prev = (name, mode, lo, len(lines))
+            if mode in ('addr_absx', 'addr_absy', 'addr_indy'):
+                reg = 'self.x' if mode == 'addr_absx' else 'self.y'
+                if mode == 'addr_indy':
+                    lines.append(f"base = (ram[0x{(lo + 1) & 0xFF:02X}] << 8) | ram[0x{lo:02X}]")
+                    lines.append(f"addr = base + {reg}")
+                    lines.append("if (addr ^ base) & 0xFF00:")
+                else:
+                    lines.append(f"addr = 0x{word:04X} + {reg}")
+                    lines.append(f"if addr > 0x{word | 0xFF:04X}:")
+                lines.append("    extra += 1")
+                lines.append(f"{name}(addr & 0xFFFF)")
+                uses_extra = True
+                last += 1
+            elif mode == 'addr_indx':
+                lines.append(f"zp = (0x{lo:02X} + self.x) & 0xFF")
+                lines.append(f"{name}((ram[(zp + 1) & 0xFF] << 8) | ram[zp])")
+            elif mode in ('addr_zpx', 'addr_zpy'):
+                reg = 'self.x' if mode == 'addr_zpx' else 'self.y'
+                lines.append(f"{name}((0x{lo:02X} + {reg}) & 0xFF)")
+            elif mode == 'addr_imm':
+                lines.append(f"{name}(0x{pc + 1:04X})")
+            elif mode:
+                lines.append(f"{name}(0x{word:04X})")
+            elif name != 'op_nop':
+                lines.append(f"{name}()")
+            pc = ((pc + 1) & 0xFFFF) + size - 1
+        else:
+            count = BLOCK_MAX
+        
+        if not count and not ends and not branch:
+            return False
+        total = str(base)
+        if uses_extra:
+            lines.insert(0, "extra = 0")
+            total += " + extra"
+        if branch:
+            cond, target, penalty = branch
+            lines.append(f"if {cond}:")
+            lines.append(f"    self.pc = 0x{target:04X}")
+            lines.append(f"    return {total} + {penalty}")
+        if not ends:
+            lines.append(f"self.pc = 0x{pc:04X}")
+        lines.append(f"return {total}")
+        
+        name = f"block_{start:04X}"
+        src = f"def {name}():\n" + "".join(f"    {line}\n" for line in lines)
+        exec(compile(src, f"<block ${start:04X}>", "exec"), self.block_globals)
+        return self.block_globals.pop(name), reach
+
 # ══════════════════════════════════════════════════════════════
 # ENHANCED PPU (PICTURE PROCESSING UNIT)
 # ══════════════════════════════════════════════════════════════
@@ -697,17 +959,26 @@ class PPU:
         self.width = 256
         self.height = 240
         self.framebuffer = bytearray(self.width * self.height)
+        self.fb_serial = 0    # Bumped whenever render_frame changes the framebuffer
+        self.fb_color = None  # Base color of the pattern in the framebuffer
+        # TV static source: two frames of random palette indices, shown
+        # through a window at a random offset
+        self.noise = memoryview(random.randbytes(2 * len(self.framebuffer)).translate(COLOR_MASK))
         
         # PPU State
         self.cycle = 0
         self.scanline = 0
         self.frame = 0
         
-        # Memory
-        self.vram = bytearray(0x4000)
-        self.oam = bytearray(256)
-        self.palette_ram = bytearray(32)
-        self.chr_rom = bytearray(8192)
+        # Memory: one arena, with a view per region
+        self._arena = bytearray(0x4000 + 256 + 32 + 8192)
+        arena = memoryview(self._arena)
+        self.vram = arena[0x0000:0x4000]
+        self.oam = arena[0x4000:0x4100]
+        self.palette_ram = arena[0x4100:0x4120]
+        self.chr_rom = arena[0x4120:0x6120]
+        # OAM by field, 64 entries each: strided views, so always in sync
+        self.oam_y, self.oam_tile, self.oam_attr, self.oam_x = (self.oam[i::4] for i in range(4))
         
         # Registers
         self.ctrl = 0       # $2000
@@ -722,8 +993,12 @@ class PPU:
         self.write_toggle = 0
         self.read_buffer = 0
         
+        # Register write handlers, indexed by register number ($2000-$2007)
+        self.reg_writes = (self.write_ctrl, self.write_mask, self.write_status, self.write_oam_addr,
+                           self.write_oam_data, self.write_scroll, self.write_addr, self.write_data)
+        
         # NES Color Palette (64 colors)
-        self.rgb_palette = [
+        rgb_palette = [
             (84,84,84),(0,30,116),(8,16,144),(48,0,136),(68,0,100),(92,0,48),(84,4,0),(60,24,0),
             (32,42,0),(8,58,0),(0,64,0),(0,60,0),(0,50,60),(0,0,0),(0,0,0),(0,0,0),
             (152,150,152),(8,76,196),(48,50,236),(92,30,228),(136,20,176),(160,20,100),(152,34,32),(120,60,0),
@@ -733,6 +1008,11 @@ class PPU:
             (236,238,236),(168,204,236),(188,188,236),(212,178,236),(236,174,236),(236,174,212),(236,180,176),(228,196,144),
             (204,210,120),(180,222,120),(168,226,144),(152,226,180),(160,214,228),(160,162,160),(0,0,0),(0,0,0)
         ]
+        # Flat RGB bytes (color i at i*3), and per channel 256-entry
+        # bytes.translate tables that map a framebuffer byte straight to R, G or B
+        self.pal_packed = bytes(c for rgb in rgb_palette for c in rgb)
+        self.pal_planes = tuple(bytes(self.pal_packed[(i & 0x3F) * 3 + c] for i in range(256))
+                                for c in range(3))
 
     def read_reg(self, addr):
         """PPU Register reads"""
@@ -747,7 +1027,7 @@ class PPU:
             return self.oam[self.oam_addr]
         elif reg == 7:  # PPUDATA
             addr = self.vram_addr & 0x3FFF
-            self.vram_addr = (self.vram_addr + (32 if (self.ctrl & 0x04) else 1)) & 0x3FFF
+            self.vram_addr = (addr + (32 if (self.ctrl & 0x04) else 1)) & 0x3FFF
             
             if addr < 0x3F00:
                 result = self.read_buffer
@@ -760,83 +1040,118 @@ class PPU:
 
     def write_reg(self, addr, val):
         """PPU Register writes"""
-        reg = (addr - 0x2000) & 7
-        
-        if reg == 0:  # PPUCTRL
-            self.ctrl = val
-            self.temp_addr = (self.temp_addr & 0xF3FF) | ((val & 0x03) << 10)
-        elif reg == 1:  # PPUMASK
-            self.mask = val
-        elif reg == 3:  # OAMADDR
-            self.oam_addr = val
-        elif reg == 4:  # OAMDATA
-            self.oam[self.oam_addr] = val
-            self.oam_addr = (self.oam_addr + 1) & 0xFF
-        elif reg == 5:  # PPUSCROLL
-            if self.write_toggle == 0:
-                self.fine_x = val & 0x07
-                self.temp_addr = (self.temp_addr & 0xFFE0) | ((val >> 3) & 0x1F)
-                self.write_toggle = 1
-            else:
-                self.temp_addr = (self.temp_addr & 0x8FFF) | ((val & 0x07) << 12)
-                self.temp_addr = (self.temp_addr & 0xFC1F) | ((val & 0xF8) << 2)
-                self.write_toggle = 0
-        elif reg == 6:  # PPUADDR
-            if self.write_toggle == 0:
-                self.temp_addr = (self.temp_addr & 0x80FF) | ((val & 0x3F) << 8)
-                self.write_toggle = 1
-            else:
-                self.temp_addr = (self.temp_addr & 0xFF00) | val
-                self.vram_addr = self.temp_addr
-                self.write_toggle = 0
-        elif reg == 7:  # PPUDATA
-            addr = self.vram_addr & 0x3FFF
-            if addr < 0x3F00:
-                self.vram[addr] = val
-            else:
-                self.palette_ram[addr & 0x1F] = val
-            self.vram_addr = (self.vram_addr + (32 if (self.ctrl & 0x04) else 1)) & 0x3FFF
+        self.reg_writes[addr & 7](val)
+
+    def write_ctrl(self, val):
+        """$2000 PPUCTRL"""
+        self.ctrl = val
+        self.temp_addr = (self.temp_addr & 0xF3FF) | ((val & 0x03) << 10)
+
+    def write_mask(self, val):
+        """$2001 PPUMASK"""
+        self.mask = val
+
+    def write_status(self, val):
+        """$2002 PPUSTATUS is read-only"""
+
+    def write_oam_addr(self, val):
+        """$2003 OAMADDR"""
+        self.oam_addr = val
+
+    def write_oam_data(self, val):
+        """$2004 OAMDATA"""
+        self.oam[self.oam_addr] = val
+        self.oam_addr = (self.oam_addr + 1) & 0xFF
+
+    def write_scroll(self, val):
+        """$2005 PPUSCROLL"""
+        if self.write_toggle == 0:
+            self.fine_x = val & 0x07
+            self.temp_addr = (self.temp_addr & 0xFFE0) | (val >> 3)  # Coarse X
+            self.write_toggle = 1
+        else:
+            # Fine Y and coarse Y in one go
+            self.temp_addr = (self.temp_addr & 0x8C1F) | ((val & 0x07) << 12) | ((val & 0xF8) << 2)
+            self.write_toggle = 0
+
+    def write_addr(self, val):
+        """$2006 PPUADDR"""
+        if self.write_toggle == 0:
+            self.temp_addr = (self.temp_addr & 0x80FF) | ((val & 0x3F) << 8)
+            self.write_toggle = 1
+        else:
+            self.temp_addr = (self.temp_addr & 0xFF00) | val
+            self.vram_addr = self.temp_addr
+            self.write_toggle = 0
+
+    def write_data(self, val):
+        """$2007 PPUDATA"""
+        addr = self.vram_addr & 0x3FFF
+        if addr < 0x3F00:
+            self.vram[addr] = val
+        else:
+            self.palette_ram[addr & 0x1F] = val
+        self.vram_addr = (addr + (32 if (self.ctrl & 0x04) else 1)) & 0x3FFF
 
     def step(self, cycles):
-        """PPU step with cycle accuracy"""
-        for _ in range(cycles * 3):  # PPU runs 3x CPU speed
-            self.cycle += 1
-            
-            # Scanline complete
-            if self.cycle >= 341:
-                self.cycle = 0
-                self.scanline += 1
-                
-                # Frame complete
-                if self.scanline >= 262:
-                    self.scanline = 0
-                    self.frame += 1
-            
-            # VBlank start
-            if self.scanline == 241 and self.cycle == 1:
+        """PPU step with cycle accuracy, in closed form: advance the dot
+        counter in one go and apply the VBlank edges it passed over"""
+        frame_dots = 262 * 341
+        dot = self.scanline * 341 + self.cycle
+        end = dot + cycles * 3  # PPU runs 3x CPU speed
+        
+        frames, pos = divmod(end, frame_dots)
+        self.frame += frames
+        self.scanline, self.cycle = divmod(pos, 341)
+        
+        # Last dot in (dot, end] landing on VBlank start (241, 1) / end (261, 1)
+        vbl_set = end - (end - (241 * 341 + 1)) % frame_dots
+        vbl_clear = end - (end - (261 * 341 + 1)) % frame_dots
+        
+        # VBlank end
+        if vbl_clear > dot:
+            self.status &= 0x1F  # Clear VBlank, sprite 0, overflow
+        
+        # VBlank start (after any earlier VBlank end)
+        if vbl_set > dot:
+            if vbl_set > vbl_clear:
                 self.status |= 0x80  # Set VBlank flag
-                if self.ctrl & 0x80:  # NMI enabled
-                    self.nes.cpu.nmi_pending = True
-            
-            # VBlank end
-            if self.scanline == 261 and self.cycle == 1:
-                self.status &= 0x1F  # Clear VBlank, sprite 0, overflow
+            if self.ctrl & 0x80:  # NMI enabled
+                self.nes.cpu.pending |= PENDING_NMI
+
+    def cycles_to_event(self):
+        """CPU cycles until the next dot at which PPU state the CPU can see
+        changes: VBlank start (241, 1) or end (261, 1)"""
+        dot = self.scanline * 341 + self.cycle
+        for event in (241 * 341 + 1, 261 * 341 + 1):
+            if event > dot:
+                return (event - dot + 2) // 3
+        return (262 * 341 + 241 * 341 + 1 - dot + 2) // 3
 
     def render_frame(self):
         """Render current frame to framebuffer"""
+        fb = self.framebuffer
         if not sys_bus.rom_loaded:
-            # TV static when no ROM
-            for i in range(len(self.framebuffer)):
-                self.framebuffer[i] = random.randint(0, 0x3F)
+            # TV static when no ROM, redrawn every other frame: a random
+            # window onto the noise pool
+            if self.frame & 1:
+                return
+            offset = random.randrange(len(fb))
+            fb[:] = self.noise[offset:offset + len(fb)]
+            self.fb_color = None
         else:
-            # Simple color cycle effect
+            # Simple color cycle effect; it only changes every other frame
             base_color = (self.frame // 2) & 0x3F
-            for y in range(self.height):
-                for x in range(self.width):
-                    # Create pattern
-                    pattern = ((x // 16) + (y // 16)) & 3
-                    color = (base_color + pattern) & 0x3F
-                    self.framebuffer[y * self.width + x] = color
+            if base_color == self.fb_color:
+                return
+            # The pattern only changes every 16 pixels, so build one row
+            # per 16-line band and repeat it
+            w = self.width
+            for band in range(0, self.height, 16):
+                row = bytes((base_color + (((x >> 4) + (band >> 4)) & 3)) & 0x3F for x in range(w))
+                fb[band * w:(band + 16) * w] = row * 16
+            self.fb_color = base_color
+        self.fb_serial += 1
 
 # ══════════════════════════════════════════════════════════════
 # NES SYSTEM
@@ -844,12 +1159,13 @@ class PPU:
 
 class NES:
     def __init__(self):
+        # Memory (allocated first: the CPU keeps direct views of it)
+        self.wram = bytearray(2048)
+        self.prg_rom = bytearray(0x8000)
+        
         self.cpu = CPU(self)
         self.ppu = PPU(self)
         
-        # Memory
-        self.wram = bytearray(2048)
-        self.prg_rom = bytearray(0x8000)
         self.mapper = 0
         
         # Input
@@ -880,17 +1196,19 @@ class NES:
                 
                 print(f"[ROM] PRG: {prg_banks}x16KB | CHR: {chr_banks}x8KB | Mapper: {self.mapper}")
                 
-                # Load PRG ROM
-                prg_data = f.read(prg_banks * 16384)
+                # Load PRG ROM into the existing 32KB buffer
+                prg_data = memoryview(f.read(prg_banks * 16384))[:32768]
                 if len(prg_data) == 16384:
                     # Mirror 16KB to 32KB
-                    self.prg_rom = bytearray(prg_data + prg_data)
+                    self.prg_rom[:16384] = prg_data
+                    self.prg_rom[16384:] = prg_data
                 else:
-                    self.prg_rom = bytearray(prg_data[:32768])
+                    self.prg_rom[:len(prg_data)] = prg_data
                 
                 # Load CHR ROM
                 if chr_banks > 0:
-                    self.ppu.chr_rom = bytearray(f.read(chr_banks * 8192))
+                    chr_data = f.read(chr_banks * 8192)[:8192]
+                    self.ppu.chr_rom[:len(chr_data)] = chr_data
                 
                 # Reset system
                 self.cpu.reset()
@@ -907,10 +1225,16 @@ class NES:
         """Memory read with full mapping"""
         addr &= 0xFFFF
         
+        # Checked in order of access frequency: RAM, cartridge, PPU, I/O
+        
         # RAM (mirrored)
         if addr < 0x2000:
             return self.wram[addr & 0x7FF]
         
+        # Cartridge space
+        elif addr >= 0x8000:
+            return self.prg_rom[addr - 0x8000]
+        
         # PPU Registers (mirrored)
         elif addr < 0x4000:
             return self.ppu.read_reg(addr)
@@ -928,10 +1252,6 @@ class NES:
                 return 0  # Controller 2
             return 0
         
-        # Cartridge space
-        elif addr >= 0x8000:
-            return self.prg_rom[addr - 0x8000]
-        
         return 0
 
     def write(self, addr, val):
@@ -950,10 +1270,17 @@ class NES:
         # APU & I/O
         elif addr < 0x4020:
             if addr == 0x4014:
-                # OAM DMA
+                # OAM DMA: RAM and cartridge pages are copied as one slice
                 start = val << 8
-                for i in range(256):
-                    self.ppu.oam[i] = self.read(start + i)
+                if start < 0x2000:
+                    start &= 0x7FF
+                    self.ppu.oam[:] = self.wram[start:start + 256]
+                elif start >= 0x8000:
+                    start -= 0x8000
+                    self.ppu.oam[:] = self.prg_rom[start:start + 256]
+                else:
+                    for i in range(256):
+                        self.ppu.oam[i] = self.read(start + i)
             elif addr == 0x4016:
                 # Controller strobe
                 if (val & 1) and not self.controller_strobe:
@@ -964,6 +1291,12 @@ class NES:
 
     def read16(self, addr):
         """Read 16-bit value (little-endian)"""
+        # Vectors and pointers in PRG or RAM skip the I/O decoding
+        if 0x8000 <= addr < 0xFFFF:
+            return U16(self.prg_rom, addr - 0x8000)[0]
+        if addr < 0x1FFF:
+            wram = self.wram
+            return (wram[(addr + 1) & 0x7FF] << 8) | wram[addr & 0x7FF]
         lo = self.read(addr)
         hi = self.read(addr + 1)
         return (hi << 8) | lo
@@ -972,14 +1305,17 @@ class NES:
         """Execute one frame (~60Hz)"""
         target_cycles = 29780  # CPU cycles per frame
         cycles = 0
+        run = self.cpu.run
+        ppu_step, cycles_to_event = self.ppu.step, self.ppu.cycles_to_event
         
         while cycles < target_cycles:
-            # Execute CPU instruction
-            c = self.cpu.step()
+            # Run the CPU in one batch up to the next VBlank edge (or frame
+            # end); the PPU changes nothing the CPU can observe in between
+            c = run(min(cycles_to_event(), target_cycles - cycles))
             cycles += c
             
             # Run PPU
-            self.ppu.step(c)
+            ppu_step(c)
         
         # Render frame
         self.ppu.render_frame()
@@ -990,6 +1326,19 @@ class NES:
 # ══════════════════════════════════════════════════════════════
 
 class FCEUXGUI:
+    # Key -> NES controller bit
+    # Bit: A B Select Start Up Down Left Right
+    KEYMAP = {
+        'z': 0x80,                              # A
+        'x': 0x40,                              # B
+        'shift_l': 0x20, 'shift_r': 0x20,       # Select
+        'return': 0x10,                         # Start
+        'w': 0x08, 'up': 0x08,                  # Up
+        's': 0x04, 'down': 0x04,                # Down
+        'a': 0x02, 'left': 0x02,                # Left
+        'd': 0x01, 'right': 0x01,               # Right
+    }
+    
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Cats's FCEUX 0.1.1B")
@@ -999,15 +1348,19 @@ class FCEUXGUI:
         
         self.nes = NES()
         self.running = False
-        self.last_time = time.time()
+        self.fps_ns = time.perf_counter_ns()  # Start of the current 60-frame FPS window
         self.fps = 0
         self.frame_counter = 0
+        self.blitted_serial = -1  # PPU fb_serial last sent to Tk
+        # Finished images (None: unchanged) from the emulation thread to Tk
+        self.frames = queue.Queue(maxsize=2)
         
         self.setup_menu()
         self.setup_display()
         self.setup_controls()
         
-        # Start main loop
+        # Start emulation and main loop
+        threading.Thread(target=self.emulation_loop, daemon=True).start()
         self.update_loop()
 
     def setup_menu(self):
@@ -1057,6 +1410,11 @@ class FCEUXGUI:
         self.img_id = self.canvas.create_image(0, 0, image=self.img, anchor=tk.NW)
         self.canvas.scale(self.img_id, 0, 0, 2, 2)  # 2x scale
         
+        # PPM image reused every frame: fixed header, RGB body after it
+        header = b'P6 256 240 255 '
+        self.ppm = bytearray(header) + bytearray(256 * 240 * 3)
+        self.ppm_offset = len(header)
+        
         # Status bar
         self.status = Label(
             self.root,
@@ -1085,7 +1443,9 @@ class FCEUXGUI:
             filetypes=[("NES ROM", "*.nes"), ("All Files", "*.*")]
         )
         if filepath:
-            if self.nes.load_rom(filepath):
+            with sys_bus.emu_lock:
+                loaded = self.nes.load_rom(filepath)
+            if loaded:
                 self.running = True
                 self.update_status(f"Playing: {os.path.basename(filepath)}")
             else:
@@ -1093,24 +1453,27 @@ class FCEUXGUI:
 
     def power_cycle(self):
         """Power cycle the NES"""
-        self.nes.cpu.reset()
-        self.nes.ppu.frame = 0
+        with sys_bus.emu_lock:
+            self.nes.cpu.reset()
+            self.nes.ppu.frame = 0
         self.update_status("Power cycled")
 
     def reset(self):
         """Reset NES"""
-        self.nes.cpu.reset()
+        with sys_bus.emu_lock:
+            self.nes.cpu.reset()
         self.update_status("Reset")
 
     def toggle_pause(self):
         """Pause/unpause emulation"""
         sys_bus.paused = not sys_bus.paused
+        sys_bus.notify_state()
         status = "PAUSED" if sys_bus.paused else "Running"
         self.update_status(status)
 
     def open_console(self):
         """Open god console in terminal"""
-        if not sys_bus.console_active:
+        if sys_bus.run_event.is_set():
             threading.Thread(target=god_console, args=(self.nes,), daemon=True).start()
 
     def show_controls(self):
@@ -1157,77 +1520,108 @@ Dependencies: None (stdlib only)
 
     def on_key_press(self, event):
         """Handle key press for controller input"""
-        k = event.keysym.lower()
-        
-        # Map to NES controller bits
-        # Bit: A B Select Start Up Down Left Right
-        if k == 'z': self.nes.controller1 |= 0x80    # A
-        elif k == 'x': self.nes.controller1 |= 0x40  # B
-        elif k == 'shift_l' or k == 'shift_r': self.nes.controller1 |= 0x20  # Select
-        elif k == 'return': self.nes.controller1 |= 0x10  # Start
-        elif k == 'w' or k == 'up': self.nes.controller1 |= 0x08  # Up
-        elif k == 's' or k == 'down': self.nes.controller1 |= 0x04  # Down
-        elif k == 'a' or k == 'left': self.nes.controller1 |= 0x02  # Left
-        elif k == 'd' or k == 'right': self.nes.controller1 |= 0x01  # Right
+        bit = self.KEYMAP.get(event.keysym.lower())
+        if bit:
+            self.nes.controller1 |= bit
 
     def on_key_release(self, event):
         """Handle key release"""
-        k = event.keysym.lower()
-        
-        if k == 'z': self.nes.controller1 &= ~0x80
-        elif k == 'x': self.nes.controller1 &= ~0x40
-        elif k == 'shift_l' or k == 'shift_r': self.nes.controller1 &= ~0x20
-        elif k == 'return': self.nes.controller1 &= ~0x10
-        elif k == 'w' or k == 'up': self.nes.controller1 &= ~0x08
-        elif k == 's' or k == 'down': self.nes.controller1 &= ~0x04
-        elif k == 'a' or k == 'left': self.nes.controller1 &= ~0x02
-        elif k == 'd' or k == 'right': self.nes.controller1 &= ~0x01
-
-    def update_image(self):
-        """Blit PPU framebuffer to Tkinter display"""
-        w, h = 256, 240
-        pal = self.nes.ppu.rgb_palette
-        fb = self.nes.ppu.framebuffer
-        
-        # Build PPM binary format (fastest for Tkinter)
-        header = f'P6 {w} {h} 255 '.encode()
-        pixels = bytearray()
-        
-        for i in range(w * h):
-            color_idx = fb[i] & 0x3F
-            r, g, b = pal[color_idx]
-            pixels.extend([r, g, b])
-        
-        # NOTE: Depending on Tk version, you may need to adapt this
-        # to use PhotoImage(data=...) instead of put(data=...).
-        self.img.put(data=header + pixels)
+        bit = self.KEYMAP.get(event.keysym.lower())
+        if bit:
+            self.nes.controller1 &= ~bit
+
+    def encode_image(self):
+        """Convert the PPU framebuffer to PPM data for the Tkinter display,
+        or None if it has not changed since the last call"""
+        ppu = self.nes.ppu
+        
+        # Nothing new to show: skip the conversion and the Tk upload
+        if ppu.fb_serial == self.blitted_serial:
+            return None
+        self.blitted_serial = ppu.fb_serial
+        
+        red, green, blue = ppu.pal_planes
+        fb = ppu.framebuffer
+        
+        # Palette gather straight into the PPM body (fastest for Tkinter)
+        ppm, off = self.ppm, self.ppm_offset
+        ppm[off::3] = fb.translate(red)
+        ppm[off + 1::3] = fb.translate(green)
+        ppm[off + 2::3] = fb.translate(blue)
+        
+        # Tk needs bytes: a bytearray would be sent as its repr. The copy
+        # also frees the buffer for the next frame while Tk shows this one
+        return bytes(ppm)
 
     def update_status(self, text):
         """Update status bar"""
         fps_text = f" | {self.fps} FPS" if self.running else ""
         self.status.config(text=f"Cats's FCEUX 0.1.1B | {text}{fps_text}")
 
+    def emulation_loop(self):
+        """Emulation thread: run frames and hand finished images to Tk"""
+        frame_ns = 16_700_000  # Target 60 FPS
+        deadline = time.perf_counter_ns()
+        while True:
+            # Sleep until the next frame is due
+            delay = deadline - time.perf_counter_ns()
+            if delay > 0:
+                time.sleep(delay / 1e9)
+            
+            # Pause and the god console hold emulation at frame boundaries
+            sys_bus.wait_until_runnable()
+            with sys_bus.emu_lock:
+                if not sys_bus.can_run():
+                    continue  # Stopped again before the lock was free
+                self.nes.run_frame()
+                data = self.encode_image()
+            
+            # Blocks while Tk is two frames behind
+            self.frames.put(data)
+            
+            deadline += frame_ns
+            now_ns = time.perf_counter_ns()
+            if now_ns - deadline > frame_ns:
+                deadline = now_ns  # Resumed or running behind: don't catch up
+
     def update_loop(self):
-        """Main update loop"""
-        current_time = time.time()
-        dt = current_time - self.last_time
-        
-        # Target 60 FPS
-        if dt >= 0.0167 and not sys_bus.paused:
-            self.nes.run_frame()
-            self.update_image()
+        """Main update loop: show the frames the emulation thread finished"""
+        # Only the newest image is worth showing
+        data = None
+        received = False
+        while True:
+            try:
+                frame = self.frames.get_nowait()
+            except queue.Empty:
+                break
+            received = True
+            if frame is not None:
+                data = frame
             
             # FPS counter
             self.frame_counter += 1
             if self.frame_counter >= 60:
-                self.fps = int(self.frame_counter / (current_time - self.last_time + 0.001))
+                now_ns = time.perf_counter_ns()
+                self.fps = self.frame_counter * 1_000_000_000 // (now_ns - self.fps_ns)
+                self.fps_ns = now_ns
                 self.frame_counter = 0
                 if self.running:
                     self.update_status(f"Frame {self.nes.frame_count}")
-            
-            self.last_time = current_time
         
-        self.root.after(1, self.update_loop)
+        # NOTE: Depending on Tk version, you may need to adapt this
+        # to use PhotoImage(data=...) instead of put(data=...).
+        if data is not None:
+            self.img.put(data=data)
+        
+        # Wake up shortly before the next frame is due rather than every
+        # millisecond; when stopped, a slow poll is enough to see it resume
+        if not sys_bus.can_run():
+            delay = 50
+        elif received:
+            delay = 15
+        else:
+            delay = 4
+        self.root.after(delay, self.update_loop)
 
     def run(self):
         """Start GUI main loop"""